@@ -0,0 +1,299 @@
+import pandas as pd
+import io
+import os
+import sys
+import gzip
+import math
+import time
+import random
+import zipfile
+from contextlib import ExitStack, contextmanager
+
+try:
+    import zstandard
+except ImportError:  # Optional: only needed for .zst inputs
+    zstandard = None
+
+try:
+    import pyarrow as pa  # Also enables pandas' multithreaded 'pyarrow' engine
+    import pyarrow.csv as pa_csv
+    HAS_PYARROW = True
+except ImportError:
+    pa = pa_csv = None
+    HAS_PYARROW = False
+
+# Compression is detected from the file name; everything else is read as plain CSV
+COMPRESSION_BY_EXTENSION = {'.gz': 'gzip', '.zip': 'zip', '.zst': 'zstd'}
+INPUT_EXTENSIONS = ('.csv',) + tuple(COMPRESSION_BY_EXTENSION)
+UPLOAD_TYPES = ['csv', 'gz', 'zip', 'zst']
+
+# Inputs at least this large use the multithreaded pyarrow parser when available
+PYARROW_MIN_BYTES = 32 * 1024 * 1024
+# Rows per chunk when the caller wants read progress (C parser)
+PROGRESS_CHUNK_ROWS = 100000
+# Bytes per record batch when the caller wants read progress (pyarrow); column
+# types are inferred from the first batch, so it also sets the inference sample
+PYARROW_BLOCK_BYTES = 16 * 1024 * 1024
+
+# --- 1. Streaming Decompression ---
+class CountingReader(io.RawIOBase):
+    """Read-only stream wrapper that counts the (decompressed) bytes read through it."""
+
+    def __init__(self, raw, source=None):
+        self.raw = raw
+        self.source = source  # Underlying (compressed) file, for progress by position
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = self.raw.readinto(buffer)
+        self.bytes_read += n or 0
+        return n
+
+def detect_compression(name):
+    """Returns 'gzip', 'zip', 'zstd' or None based on the file name."""
+    return COMPRESSION_BY_EXTENSION.get(os.path.splitext(str(name).lower())[1])
+
+def strip_extensions(name):
+    """'vendor.csv.gz' -> 'vendor'"""
+    base = os.path.basename(str(name))
+    if detect_compression(base):
+        base = os.path.splitext(base)[0]
+    return os.path.splitext(base)[0]
+
+@contextmanager
+def open_csv_stream(source, name=None):
+    """
+    Opens a path or binary file object and yields a CountingReader over the
+    decompressed CSV bytes. Decompression is streamed block by block; the
+    inflated file is never held in memory as a whole.
+    """
+    name = name or getattr(source, 'name', None) or source
+    compression = detect_compression(name)
+    owns_file = isinstance(source, (str, os.PathLike))
+    fileobj = open(source, 'rb') if owns_file else source
+    inner = None
+
+    try:
+        if compression == 'gzip':
+            inner = gzip.GzipFile(fileobj=fileobj, mode='rb')
+        elif compression == 'zip':
+            archive = zipfile.ZipFile(fileobj)
+            members = [m for m in archive.infolist() if not m.is_dir()]
+            csv_members = [m for m in members if m.filename.lower().endswith('.csv')] or members
+            if not csv_members:
+                raise ValueError(f"Zip archive '{name}' contains no files")
+            inner = archive.open(csv_members[0])
+        elif compression == 'zstd':
+            if zstandard is None:
+                raise ImportError("Reading .zst files requires the 'zstandard' package (pip install zstandard)")
+            inner = zstandard.ZstdDecompressor().stream_reader(fileobj)
+        else:
+            inner = fileobj
+
+        yield CountingReader(inner, source=fileobj)
+    finally:
+        if inner is not None and inner is not fileobj:
+            inner.close()
+        if owns_file:
+            fileobj.close()
+
+# --- 2. Reader Backends ---
+def source_size(source):
+    """Size in bytes of a path or file object (0 if unknown)."""
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    size = getattr(source, 'size', None)
+    if size is not None:
+        return size
+    try:
+        position = source.tell()
+        source.seek(0, os.SEEK_END)
+        size = source.tell()
+        source.seek(position)
+        return size
+    except (AttributeError, OSError):
+        return 0
+
+def choose_backend(size, backend='auto'):
+    """'pyarrow' for large inputs when pyarrow is installed, otherwise pandas' C parser."""
+    if backend == 'auto':
+        return 'pyarrow' if HAS_PYARROW and size >= PYARROW_MIN_BYTES else 'c'
+    if backend == 'pyarrow' and not HAS_PYARROW:
+        raise ImportError("The 'pyarrow' CSV backend requires the 'pyarrow' package")
+    return backend
+
+def iter_pyarrow_chunks(stream):
+    """
+    Streams record batches from pyarrow's CSV reader as DataFrames indexed by
+    file row position. Missing values follow pandas' defaults ('', 'NA',
+    'N/A', 'null', ...), including in text columns, and all-missing columns
+    come back as float NaN like the C parser's.
+    """
+    reader = pa_csv.open_csv(
+        stream,
+        read_options=pa_csv.ReadOptions(block_size=PYARROW_BLOCK_BYTES),
+        convert_options=pa_csv.ConvertOptions(strings_can_be_null=True),
+    )
+    offset = 0
+    for batch in reader:
+        empty = [field.name for field in batch.schema if pa.types.is_null(field.type)]
+        chunk = batch.to_pandas()
+        del batch
+        if empty:
+            chunk[empty] = chunk[empty].astype('float64')
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset += len(chunk)
+        yield chunk
+
+def read_leads_csv(source, name=None, backend='auto', on_progress=None, on_chunk=None, **read_kwargs):
+    """
+    Reads a plain or compressed lead CSV with the chosen backend.
+
+    Returns (df, stats) where stats records the backend, compression, input
+    and decompressed sizes, elapsed seconds and decompressed MB/s. When a
+    callback is given the file is read in chunks (indexed as in a single
+    read): PROGRESS_CHUNK_ROWS rows with the C parser, PYARROW_BLOCK_BYTES
+    record batches with pyarrow's streaming reader. `on_chunk(chunk)` may
+    return a replacement for each chunk (e.g. the chunk enriched) and
+    `on_progress(fraction)` is called after each, based on how far into the
+    input file the read is. If a late value doesn't fit the column types
+    pyarrow inferred from its first batch, the rest of the file is read with
+    the C parser (backend 'pyarrow+c'). The python backend passes the whole frame to
+    on_chunk. Extra `read_kwargs` are pandas options, so chunked reads that
+    use them go through the C parser.
+    """
+    compressed_bytes = source_size(source)
+    engine = choose_backend(compressed_bytes, backend)
+    chunked = on_progress is not None or on_chunk is not None
+    if chunked and engine == 'pyarrow' and read_kwargs:
+        engine = 'c'
+
+    start = time.perf_counter()
+    with ExitStack() as stack:
+        stream = stack.enter_context(open_csv_stream(source, name))
+        if chunked and engine in ('c', 'pyarrow'):
+            chunks = []
+            rows_read = 0
+
+            def read_chunks(reader, stream):
+                nonlocal rows_read
+                for chunk in reader:
+                    rows_read += len(chunk)
+                    chunks.append(chunk if on_chunk is None else on_chunk(chunk))
+                    del chunk
+                    if on_progress is not None:
+                        on_progress(min(stream.source.tell() / compressed_bytes, 1.0) if compressed_bytes else 0.0)
+
+            if engine == 'pyarrow':
+                failed = []
+
+                def until_invalid(reader):
+                    # Stops at a conversion error from the reader itself (not from on_chunk)
+                    try:
+                        yield from reader
+                    except pa.ArrowInvalid:
+                        failed.append(True)
+
+                read_chunks(until_invalid(iter_pyarrow_chunks(stream)), stream)
+                if failed:
+                    # pyarrow fixes column types from the first batch, so a late value that
+                    # doesn't fit (e.g. 'unknown' in a numeric column) fails the read; the C
+                    # parser infers types per chunk, so it reads the rest of the file
+                    engine = 'pyarrow+c'
+                    if not isinstance(source, (str, os.PathLike)):
+                        source.seek(0)
+                    done = rows_read
+                    stream = stack.enter_context(open_csv_stream(source, name))
+                    reader = pd.read_csv(stream, engine='c', chunksize=PROGRESS_CHUNK_ROWS,
+                                         skiprows=lambda line: 0 < line <= done)
+                    read_chunks((chunk.set_axis(chunk.index + done) for chunk in reader), stream)
+            else:
+                read_chunks(pd.read_csv(stream, engine=engine, chunksize=PROGRESS_CHUNK_ROWS, **read_kwargs), stream)
+            if not chunks:
+                df = pd.read_csv(io.BytesIO(b''))
+            else:
+                # Chunks keep the file's row positions as their index (filtered rows are missing)
+                df = pd.concat(chunks, ignore_index=on_chunk is None) if len(chunks) > 1 else chunks[0]
+            del chunks
+        else:
+            df = pd.read_csv(stream, engine=engine, **read_kwargs)
+            if on_chunk is not None:
+                df = on_chunk(df)
+        csv_bytes = stream.bytes_read
+    seconds = time.perf_counter() - start
+
+    stats = {
+        'backend': engine,
+        'compression': detect_compression(name or getattr(source, 'name', None) or source),
+        'input_mb': round(compressed_bytes / 1e6, 2),
+        'csv_mb': round(csv_bytes / 1e6, 2),
+        'seconds': round(seconds, 3),
+        'mb_per_s': round(csv_bytes / 1e6 / seconds, 1) if seconds > 0 else 0.0,
+    }
+    return df, stats
+
+def reservoir_sample_csv(source, sample_rows, name=None, seed=None, on_progress=None):
+    """
+    Uniform random sample of `sample_rows` data rows from a plain or
+    compressed CSV in one streaming pass (Algorithm L), parsing only the rows
+    it keeps. Returns (sample_df, total_rows); the sample's index is each
+    row's position in the file, as in a full pd.read_csv. `on_progress(fraction)`
+    is called every PROGRESS_CHUNK_ROWS lines, as in read_leads_csv.
+
+    Rows are counted by line, so files with quoted line breaks raise ValueError.
+    """
+    compressed_bytes = source_size(source) if on_progress is not None else 0
+    rng = random.Random(seed)
+    reservoir, positions = [], []
+    total_rows = 0
+
+    with open_csv_stream(source, name) as stream:
+        lines = io.BufferedReader(stream, buffer_size=1024 * 1024)
+        header = lines.readline()
+
+        # Algorithm L: jump straight to the next row that enters the reservoir
+        weight = math.exp(math.log(rng.random()) / sample_rows)
+        next_pick = sample_rows + int(math.log(rng.random()) / math.log(1 - weight))
+        for line in lines:
+            if not line.strip():
+                continue  # pandas skips blank lines too
+            if total_rows < sample_rows:
+                reservoir.append(line)
+                positions.append(total_rows)
+            elif total_rows == next_pick:
+                slot = rng.randrange(sample_rows)
+                reservoir[slot], positions[slot] = line, total_rows
+                weight *= math.exp(math.log(rng.random()) / sample_rows)
+                next_pick += int(math.log(rng.random()) / math.log(1 - weight)) + 1
+            total_rows += 1
+            if on_progress is not None and total_rows % PROGRESS_CHUNK_ROWS == 0:
+                on_progress(min(stream.source.tell() / compressed_bytes, 1.0) if compressed_bytes else 0.0)
+
+    order = sorted(range(len(positions)), key=positions.__getitem__)
+    body = b''.join(reservoir[i] if reservoir[i].endswith(b'\n') else reservoir[i] + b'\n' for i in order)
+    sample = pd.read_csv(io.BytesIO(header + body))
+    if len(sample) != len(order):
+        raise ValueError("Rows span several lines (quoted line breaks); cannot sample by line")
+    sample.index = pd.Index([positions[i] for i in order])
+    return sample, total_rows
+
+def format_ingest_stats(stats):
+    """One-line summary, e.g. '120.3 MB CSV (gzip, 12.1 MB) via pyarrow at 85.2 MB/s'"""
+    source = f"{stats['compression']}, {stats['input_mb']:.1f} MB" if stats['compression'] else 'uncompressed'
+    return f"{stats['csv_mb']:.1f} MB CSV ({source}) via {stats['backend']} at {stats['mb_per_s']:.1f} MB/s"
+
+if __name__ == '__main__':
+    # Benchmark every available backend on the given files
+    if len(sys.argv) < 2:
+        print("Usage: python csv_ingest.py FILE [FILE ...]")
+        sys.exit(1)
+
+    backends = ['c', 'python'] + (['pyarrow'] if HAS_PYARROW else [])
+    for path in sys.argv[1:]:
+        print(f"\n{path}")
+        for engine in backends:
+            df, stats = read_leads_csv(path, backend=engine)
+            print(f"  {engine:<8} {len(df):>10} rows  {stats['seconds']:>8.2f}s  {stats['mb_per_s']:>8.1f} MB/s")
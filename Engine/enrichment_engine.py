@@ -2,6 +2,9 @@ import pandas as pd
 import numpy as np
 import os
 
+from csv_ingest import read_leads_csv, format_ingest_stats
+from tech_kb import default_kb
+
 # Get the directory where this script is located
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 # Input file is in the same directory as the script (Mock Dataset folder)
@@ -9,18 +12,36 @@ FILE_NAME = os.path.join(SCRIPT_DIR, 'Mock Dataset Lead Generation Tool.csv')
 # Output file goes to the parent directory (Lead generator folder)
 OUTPUT_FILE = os.path.join(os.path.dirname(SCRIPT_DIR), 'enriched_leads_final.csv')
 
+# --- 1. Scoring Weights ---
+# Points added per rule (see calculate_ai_score / add_tech_flag); also the
+# baseline configuration for what-if analysis in what_if.py
+SCORE_WEIGHTS = {
+    'base': 50,                  # Starting neutral base score
+    'age_20_plus': 20,
+    'age_10_to_19': 10,
+    'age_under_5': -10,
+    'revenue_sweet_spot': 15,    # $3M - $10M
+    'revenue_outside': -5,
+    'traditional_industry': 10,
+    'legacy_tech': 15,
+}
+# Expanded list of traditional industries found in the 25-entry dataset
+TRADITIONAL_INDUSTRIES = ['Manufacturing', 'Retail', 'Consulting', 'Agency', 'Traditional Consulting', 'Logistics', 'Accounting', 'Insurance', 'Environmental']
+# Score at or above which a lead counts as High Priority in the console summary
+HIGH_PRIORITY_SCORE = 70
+
 # --- 2. Core Scoring Logic ---
 def calculate_ai_score(df):
     """
     Calculates the simulated M&A AI Acquisition Score based on Caprae's focus.
     (Proprietary Business Logic)
     """
-    df['AI_Acquisition_Score'] = 50  # Starting neutral base score
+    df['AI_Acquisition_Score'] = SCORE_WEIGHTS['base']  # Starting neutral base score
 
     # Rule 1: Age Penalty/Bonus (Older = more likely to need modernization)
-    df.loc[df['Years in Business'] >= 20, 'AI_Acquisition_Score'] += 20
-    df.loc[(df['Years in Business'] >= 10) & (df['Years in Business'] < 20), 'AI_Acquisition_Score'] += 10
-    df.loc[df['Years in Business'] < 5, 'AI_Acquisition_Score'] -= 10
+    df.loc[df['Years in Business'] >= 20, 'AI_Acquisition_Score'] += SCORE_WEIGHTS['age_20_plus']
+    df.loc[(df['Years in Business'] >= 10) & (df['Years in Business'] < 20), 'AI_Acquisition_Score'] += SCORE_WEIGHTS['age_10_to_19']
+    df.loc[df['Years in Business'] < 5, 'AI_Acquisition_Score'] += SCORE_WEIGHTS['age_under_5']
 
     # Rule 2: Revenue Sweet Spot (Caprae's target range: $3M - $10M)
     # Robust cleaning of currency symbols, commas, and quotes before conversion
@@ -29,69 +50,65 @@ def calculate_ai_score(df):
     df['Annual Revenue (USD)'] = pd.to_numeric(df['Annual Revenue (USD)'], errors='coerce')
     
     df.loc[(df['Annual Revenue (USD)'] >= 3000000) & 
-           (df['Annual Revenue (USD)'] <= 10000000), 'AI_Acquisition_Score'] += 15
+           (df['Annual Revenue (USD)'] <= 10000000), 'AI_Acquisition_Score'] += SCORE_WEIGHTS['revenue_sweet_spot']
     df.loc[(df['Annual Revenue (USD)'] > 10000000) | 
-           (df['Annual Revenue (USD)'] < 3000000), 'AI_Acquisition_Score'] -= 5
+           (df['Annual Revenue (USD)'] < 3000000), 'AI_Acquisition_Score'] += SCORE_WEIGHTS['revenue_outside']
 
     # Rule 3: Industry Focus (Traditional industries are prime for AI transformation)
-    # Expanded list of traditional industries found in the 25-entry dataset
-    df.loc[df['Industry'].isin(['Manufacturing', 'Retail', 'Consulting', 'Agency', 'Traditional Consulting', 'Logistics', 'Accounting', 'Insurance', 'Environmental']), 'AI_Acquisition_Score'] += 10
+    df.loc[df['Industry'].isin(TRADITIONAL_INDUSTRIES), 'AI_Acquisition_Score'] += SCORE_WEIGHTS['traditional_industry']
 
     return df
 
-# --- 3. Technical Enrichment (Legacy Tech Flag Simulation) ---
+# --- 3. Technical Enrichment (Legacy Tech Flag) ---
 def add_tech_flag(df):
     """
-    Simulates detection of legacy tech stack, indicating a high-value
+    Looks up each lead's tech stack in the technographic knowledge base
+    (tech_kb.KB_FILE) and flags legacy stacks, indicating a high-value
     AI-Readiness opportunity. (Technical Sophistication)
     """
-    
-    # Expanded Mock Tech Data for all 25 entries (using only the Company Name as key)
-    tech_data = {
-        'OldSchool Mfg. Co.': 'Legacy (ColdFusion, On-Premise DB)',
-        'Coastal Retail Group': 'Legacy (Old E-Comm Platform)',
-        'Central Distribution LLC': 'Legacy (AS400 ERP, Desktop App)',
-        'Harbor Consulting Inc.': 'Legacy (SharePoint 2010, Local Servers)',
-        'Midwest Machining Corp': 'Legacy (Proprietary CAD/CAM, Old OS)',
-        'Alpha Digital Inc.': 'Modern (React, Python)',
-        'Prime HR Solutions': 'Modern (Cloud-native SaaS)',
-        'Secure Vault Storage': 'Hybrid (Custom PHP, Modern DB)',
-        'Global Transport Co.': 'Legacy (Custom Cobol Backend)',
-        'Elite Finance Group': 'Modern (AWS Serverless)',
-        'TechForward Corp': 'Modern (Next.js, Go)',
-        'Beta Solutions LLC': 'Modern (PHP, Cloud)',
-        'Apex AI Systems': 'Modern (Python, TensorFlow)',
-        'Future Health SaaS': 'Modern (Azure, Microservices)',
-        'Green Energy Installers': 'Hybrid (Off-the-shelf CRM)',
-        'Regional Accounting PLC': 'Legacy (Quickbooks Desktop, Windows Server)',
-        'Metro Web Design': 'Modern (WordPress, Cloudflare)',
-        'North Star Logistics': 'Legacy (Custom FoxPro System)',
-        'South Side Retailer': 'Legacy (Magento 1.x)',
-        'Data Analytics Hub': 'Modern (Python, Tableau)',
-        'Zenith Labs Corp': 'Modern (R Studio, Jupyter)',
-        'Coastline Agencies': 'Legacy (Access DB, Custom Forms)',
-        'Pioneer Tools Ltd': 'Legacy (DOS-based Inventory)',
-        'River Valley Services': 'Hybrid (Salesforce, Custom Legacy Billing)',
-        'Blue Sky Software': 'Modern (Ruby on Rails)',
-    }
-
-    # Ensure 'Company Name' is the column used for mapping
-    df['simulated_tech_stack'] = df['Company Name'].map(tech_data)
-
-    # Flag targets with 'Legacy' or 'Old' keywords
-    df['Legacy_Tech_Flag'] = df['simulated_tech_stack'].apply(
-        # Check if the value is a string before checking for keywords
-        lambda x: True if isinstance(x, str) and ('Legacy' in x or 'Old' in x or 'Cobol' in x or 'AS400' in x or 'DOS' in x or 'FoxPro' in x or 'Access DB' in x) else False
-    )
+    # Batch join: exact domain / normalized name first, then fuzzy name matching
+    matches = default_kb().join(df['Company Name'], df['Website'] if 'Website' in df.columns else None)
+
+    df['simulated_tech_stack'] = matches['tech_stack'].astype(object)
+    df['Tech_Match_Score'] = matches['match_score']
+    df['Legacy_Tech_Flag'] = matches['legacy_flag']
 
     # Final Adjustment: Prioritize leads with Legacy Tech
-    df.loc[df['Legacy_Tech_Flag'] == True, 'AI_Acquisition_Score'] += 15
+    df.loc[df['Legacy_Tech_Flag'] == True, 'AI_Acquisition_Score'] += SCORE_WEIGHTS['legacy_tech']
 
     # --- Final Cleanup ---
     df['AI_Acquisition_Score'] = np.clip(df['AI_Acquisition_Score'], 0, 100).round().astype(int)
 
     return df
 
+# --- 4. Data Cleaning ---
+def clean_records(df):
+    """
+    Removes header/descriptive rows and keeps only records with a numeric
+    'Years in Business' value.
+    """
+    # A single coercion both finds rows that are NaN / descriptive text and converts the rest
+    years = pd.to_numeric(df['Years in Business'], errors='coerce')
+    valid = years.notna()
+
+    df_cleaned = df[valid].copy()
+    years = years[valid]
+    # Whole-number text coerces to float next to the NaNs; restore integers now they're gone
+    if years.dtype.kind == 'f' and (years % 1 == 0).all():
+        years = years.astype('int64')
+    df_cleaned['Years in Business'] = years
+
+    return df_cleaned
+
+def enrich_records(df):
+    """
+    Runs the full enrichment pipeline (cleaning, scoring, tech flag) on a raw
+    DataFrame as read from a lead CSV.
+    """
+    df_cleaned = clean_records(df)
+    df_scored = calculate_ai_score(df_cleaned)
+    return add_tech_flag(df_scored)
+
 if __name__ == '__main__':
     
     try:
@@ -99,17 +116,12 @@ if __name__ == '__main__':
         if not os.path.exists(FILE_NAME):
             raise FileNotFoundError(f"Data file not found: {FILE_NAME}")
             
-        df = pd.read_csv(FILE_NAME)
+        # Plain, .gz, .zip or .zst input; large files use the multithreaded reader
+        df, ingest_stats = read_leads_csv(FILE_NAME)
+        print(f"Read {format_ingest_stats(ingest_stats)}")
         
         # 1b. Clean the data: Remove header rows and filter valid business data
-        # Remove rows where 'Years in Business' is NaN or contains descriptive text
-        df_cleaned = df.dropna(subset=['Years in Business']).copy()
-        
-        # Additional filtering: Remove rows where 'Years in Business' is not numeric
-        df_cleaned = df_cleaned[pd.to_numeric(df_cleaned['Years in Business'], errors='coerce').notna()].copy()
-        
-        # Convert 'Years in Business' to numeric
-        df_cleaned['Years in Business'] = pd.to_numeric(df_cleaned['Years in Business'], errors='coerce')
+        df_cleaned = clean_records(df)
         
         print(f"Loaded {len(df_cleaned)} valid company records for processing.")
         
@@ -134,7 +146,7 @@ if __name__ == '__main__':
         print(f"\nSUMMARY STATISTICS:")
         print(f"Average AI Score: {df_enriched['AI_Acquisition_Score'].mean():.1f}")
         print(f"Companies with Legacy Tech: {df_enriched['Legacy_Tech_Flag'].sum()}")
-        print(f"High Priority Leads (Score >= 70): {len(df_enriched[df_enriched['AI_Acquisition_Score'] >= 70])}")
+        print(f"High Priority Leads (Score >= {HIGH_PRIORITY_SCORE}): {len(df_enriched[df_enriched['AI_Acquisition_Score'] >= HIGH_PRIORITY_SCORE])}")
 
     except FileNotFoundError as e:
         print(f"File error: {e}")
@@ -0,0 +1,565 @@
+import pandas as pd
+import numpy as np
+import os
+import re
+import sys
+import time
+import pickle
+import argparse
+import functools
+
+from csv_ingest import read_leads_csv
+
+# Get the directory where this script is located
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Technographic knowledge base: one company per row with 'Company Name', 'Website' and 'Tech Stack'
+# (plain, .gz, .zip or .zst CSV)
+KB_FILE = os.path.join(SCRIPT_DIR, 'tech_stack_kb.csv')
+# The built index is saved next to the knowledge base file
+INDEX_SUFFIX = '.kbindex'
+# Bump when normalization or the index layout changes so saved indexes are rebuilt
+INDEX_VERSION = 2
+
+# Fuzzy name matches must be one edit (a typo) apart, not changing a digit, and
+# have at least this trigram (Jaccard) similarity, which rules out short names
+MATCH_THRESHOLD = 0.6
+# Fuzzy candidates come from an inverted index of character CANDIDATE_GRAM-grams, hashed
+# into at most MAX_GRAM_BUCKETS posting lists; each name is probed with its PROBE_GRAMS rarest grams
+CANDIDATE_GRAM = 6
+PROBE_GRAMS = 9
+MAX_GRAM_BUCKETS = 1 << 22
+# Posting lists are sorted by name length (capped here) so a probe only reads records
+# of about the query's length; (gram, length) keys must fit in int32
+LENGTH_CAP = 255
+# Candidate postings expanded per fuzzy batch (bounds working memory)
+MAX_CANDIDATES = 4000000
+
+# Tech stack descriptions containing any of these mark a lead as running legacy tech
+LEGACY_KEYWORDS = ['Legacy', 'Old', 'Cobol', 'AS400', 'DOS', 'FoxPro', 'Access DB']
+
+# Name variants that should compare equal once normalized
+ABBREVIATIONS = {
+    'manufacturing': 'mfg', 'company': 'co', 'corporation': 'corp', 'incorporated': 'inc',
+    'limited': 'ltd', 'international': 'intl', 'technologies': 'tech', 'technology': 'tech',
+    'brothers': 'bros', 'associates': 'assoc',
+}
+LEGAL_SUFFIXES = ['inc', 'llc', 'llp', 'lp', 'ltd', 'co', 'corp', 'plc', 'gmbh']
+
+# Normalized names use only [a-z0-9 ], so an n-gram packs into one base-37 integer
+ALPHABET = 'abcdefghijklmnopqrstuvwxyz0123456789 '
+N_TRIGRAMS = len(ALPHABET) ** 3
+CHAR_CODES = np.zeros(256, dtype=np.int64)
+CHAR_CODES[np.frombuffer(ALPHABET.encode('ascii'), dtype=np.uint8)] = np.arange(len(ALPHABET))
+
+ABBREVIATION_PATTERN = r'\b(?:' + '|'.join(ABBREVIATIONS) + r')\b'
+SUFFIX_PATTERN = r'(?:\s(?:' + '|'.join(LEGAL_SUFFIXES) + r'))+$'
+
+# --- 1. Normalization ---
+def normalize_names(names):
+    """
+    Lowercase ASCII company names with punctuation removed, common words
+    abbreviated and trailing legal suffixes dropped:
+    'OldSchool Manufacturing Co.' -> 'oldschool mfg'. Missing names become ''.
+    """
+    names = pd.Series(names, dtype='str').fillna('')
+    index = names.index
+    names = names.reset_index(drop=True)  # Positional alignment below, even for duplicate labels
+    # The slower steps only run on the rows that need them
+    ascii_only = names.str.isascii()
+    if not ascii_only.all():
+        names = names.where(ascii_only, names[~ascii_only].str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii'))
+    names = names.str.lower().str.replace('&', ' and ', regex=False)
+    punctuated = names.str.contains(r'[^a-z0-9 ]| {2}', regex=True)
+    if punctuated.any():
+        names = names.where(~punctuated, names[punctuated].str.replace(r'[^a-z0-9]+', ' ', regex=True))
+    abbreviated = names.str.contains(ABBREVIATION_PATTERN, regex=True)
+    if abbreviated.any():
+        names = names.where(~abbreviated, names[abbreviated].str.replace(
+            ABBREVIATION_PATTERN, lambda m: ABBREVIATIONS[m.group(0)], regex=True))
+    names = (' ' + names.str.strip()).str.replace(SUFFIX_PATTERN, '', regex=True)
+    return names.str.strip().set_axis(index)
+
+def normalize_domains(websites):
+    """'https://www.Example.com/about' -> 'example.com'; values without a dot become ''."""
+    domains = pd.Series(websites, dtype='str').fillna('').str.strip().str.lower()
+    domains = domains.str.replace(r'^(?:[a-z][a-z0-9+.-]*://)?(?:www\.)?([^/:?#\s]*).*$', r'\1', regex=True)
+    return domains.where(domains.str.contains('.', regex=False), '')
+
+def factorize_normalized(values, normalize):
+    """
+    (codes, uniques) for the normalized values, normalizing each distinct raw
+    value once: lead lists repeat names, and normalization is the slow part.
+    """
+    raw_codes, raw_uniques = pd.factorize(np.asarray(values, dtype=object), use_na_sentinel=False)
+    codes, uniques = pd.factorize(normalize(raw_uniques).to_numpy())
+    return codes[raw_codes], uniques
+
+# --- 2. Character N-Grams ---
+def sorted_unique(values):
+    """Sorted distinct values (sort + neighbour compare: much faster than np.unique on large int arrays)."""
+    values = np.sort(values)
+    keep = np.ones(len(values), dtype=bool)
+    keep[1:] = values[1:] != values[:-1]
+    return values[keep]
+
+def search_ranges(haystack, lowest, highest):
+    """
+    (first, count) of the haystack values in [lowest, highest] per pair. The
+    needles are searched in sorted order, which keeps the binary searches
+    cache-friendly: several times faster than searching them as given.
+    """
+    order = np.argsort(lowest)
+    first, last = np.empty(len(lowest), dtype=np.int64), np.empty(len(lowest), dtype=np.int64)
+    first[order] = np.searchsorted(haystack, lowest[order])
+    last[order] = np.searchsorted(haystack, highest[order], side='right')
+    return first, last - first
+
+def spans(starts, counts):
+    """Concatenated ranges [start, start + count) as one index array."""
+    ends = np.cumsum(counts)
+    return np.repeat(starts - ends + counts, counts) + np.arange(ends[-1] if len(ends) else 0)
+
+def gram_sets(normalized, n=3, buckets=None, unique=True):
+    """
+    Character n-grams of each normalized name (padded with a space on both
+    sides) as CSR arrays: offsets (len + 1) and gram ids, each name's ids
+    sorted and unique (in text order, repeats kept, when `unique` is False).
+    Ids are exact base-37 codes, or hashed into `buckets` when given
+    (collisions only add fuzzy candidates).
+    """
+    normalized = pd.Series(normalized, dtype='str')
+    count = len(normalized)
+    lengths = normalized.str.len().to_numpy(dtype=np.int64) + 2
+    text = ''.join((' ' + normalized + ' ').tolist()).encode('ascii')
+    codes = CHAR_CODES[np.frombuffer(text, dtype=np.uint8)]
+
+    owner = np.repeat(np.arange(count, dtype=np.int64), lengths)
+    width = max(len(codes) - n + 1, 0)
+    grams = np.zeros(width, dtype=np.int64)
+    for k in range(n):
+        grams = grams * len(ALPHABET) + codes[k:k + width]
+    if buckets is not None:
+        # Multiplicative hash: the top log2(buckets) bits of id * golden-ratio constant
+        shift = np.uint64(65 - int(buckets).bit_length())
+        grams = ((grams.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)) >> shift).astype(np.int64)
+    within_name = owner[:width] == owner[n - 1:n - 1 + width]
+    offsets = np.zeros(count + 1, dtype=np.int64)
+    if not unique:
+        np.cumsum(np.maximum(lengths - n + 1, 0), out=offsets[1:])
+        return offsets, grams[within_name]
+
+    # (name, gram) pairs packed as name << bits | gram
+    bits = (int(buckets or len(ALPHABET) ** n) - 1).bit_length()
+    keys = sorted_unique((owner[:width][within_name] << bits) | grams[within_name])
+    np.cumsum(np.bincount(keys >> bits, minlength=count), out=offsets[1:])
+    return offsets, keys & ((1 << bits) - 1)
+
+def trigram_sets(normalized):
+    """Exact trigram sets used for similarity."""
+    return gram_sets(normalized, 3)
+
+def probe_sets(normalized, buckets, unique=True):
+    """Hashed CANDIDATE_GRAM-gram sets used to find fuzzy candidates."""
+    return gram_sets(normalized, CANDIDATE_GRAM, buckets, unique)
+
+# --- 3. Edit Distance ---
+def char_buffer(normalized):
+    """Normalized names as one ASCII byte array plus offsets (len + 1)."""
+    normalized = pd.Series(normalized, dtype='str')
+    offsets = np.zeros(len(normalized) + 1, dtype=np.int64)
+    np.cumsum(normalized.str.len().to_numpy(dtype=np.int64), out=offsets[1:])
+    return np.frombuffer(''.join(normalized.tolist()).encode('ascii'), dtype=np.uint8), offsets
+
+def common_run(a_chars, a_starts, b_chars, b_starts, limit, step=1):
+    """
+    Per pair, how many characters match walking from a_starts / b_starts in
+    direction `step` (1: common prefix, -1: common suffix from the last
+    characters), stopping at `limit`.
+    """
+    run = np.zeros(len(limit), dtype=np.int64)
+    active = np.flatnonzero(limit > 0)
+    while len(active):
+        same = a_chars[a_starts[active] + step * run[active]] == b_chars[b_starts[active] + step * run[active]]
+        active = active[same]
+        run[active] += 1
+        active = active[run[active] < limit[active]]
+    return run
+
+def one_edit_apart(a_chars, a_offsets, a_ids, b_chars, b_offsets, b_ids):
+    """
+    True for each (a_ids, b_ids) pair of strings at most one insertion,
+    deletion or substitution apart, where the edited character is not a
+    digit ('Nova 2 Logistics' and 'Nova 3 Logistics' are different companies).
+    """
+    a_starts, b_starts = a_offsets[a_ids], b_offsets[b_ids]
+    a_lengths, b_lengths = a_offsets[a_ids + 1] - a_starts, b_offsets[b_ids + 1] - b_starts
+    shorter = np.minimum(a_lengths, b_lengths)
+    prefix = common_run(a_chars, a_starts, b_chars, b_starts, shorter)
+    suffix = common_run(a_chars, a_starts + a_lengths - 1, b_chars, b_starts + b_lengths - 1, shorter - prefix, step=-1)
+    close = (np.abs(a_lengths - b_lengths) <= 1) & (prefix + suffix >= np.maximum(a_lengths, b_lengths) - 1)
+
+    # The edit sits just after the common prefix
+    def digit_at(chars, starts, lengths):
+        edited = chars[np.minimum(starts + prefix, len(chars) - 1)] if len(chars) else np.zeros(len(starts), dtype=np.uint8)
+        return (prefix < lengths) & (edited >= ord('0')) & (edited <= ord('9'))
+    return close & ~digit_at(a_chars, a_starts, a_lengths) & ~digit_at(b_chars, b_starts, b_lengths)
+
+# --- 4. Knowledge Base Index ---
+class TechStackKB:
+    """
+    Tech-stack knowledge base with a persisted lookup index.
+
+    Leads are joined by exact normalized domain, then exact normalized name
+    (both hash lookups), then fuzzy name: candidates come from an inverted
+    index of character 6-grams (records sharing most of the name's rarest
+    6-grams) and must be one edit away and similar by trigram Jaccard.
+    """
+
+    def __init__(self, state):
+        self.__dict__.update(state)
+
+    @classmethod
+    def build(cls, records):
+        """Indexes a DataFrame with 'Company Name', 'Tech Stack' and optionally 'Website'."""
+        missing = {'Company Name', 'Tech Stack'} - set(records.columns)
+        if missing:
+            raise ValueError(f"Knowledge base is missing column(s): {', '.join(sorted(missing))}")
+        names = normalize_names(records['Company Name']).to_numpy()
+        websites = records['Website'] if 'Website' in records.columns else pd.Series('', index=records.index)
+        domains = normalize_domains(websites).to_numpy()
+        stacks = pd.Categorical(records['Tech Stack'])
+
+        # Exact indexes: first record per normalized name / domain
+        def exact_index(keys):
+            first = ~pd.Series(keys).duplicated().to_numpy() & (keys != '')
+            return pd.Index(keys[first]), np.flatnonzero(first)
+
+        name_keys, name_records = exact_index(names)
+        domain_keys, domain_records = exact_index(domains)
+
+        # Names for the edit check, and trigram sets as sorted (record, trigram) keys
+        name_chars, name_offsets = char_buffer(names)
+        offsets, trigrams = trigram_sets(names)
+        sizes = np.diff(offsets)
+        record_keys = np.repeat(np.arange(len(sizes), dtype=np.int64), sizes) * N_TRIGRAMS + trigrams
+
+        # Candidate index: records per hashed 6-gram, ordered by name length (then record id),
+        # with about 16 buckets per record so small knowledge bases stay small on disk
+        gram_buckets = min(1 << max(16 * len(names), 1024).bit_length(), MAX_GRAM_BUCKETS)
+        gram_offsets, grams = probe_sets(names, gram_buckets)
+        gram_owner = np.repeat(np.arange(len(names), dtype=np.int32), np.diff(gram_offsets))
+        # (gram, length) keys, searched to find the records of one length range in a posting list
+        posting_keys = grams * (LENGTH_CAP + 1) + np.minimum(np.diff(name_offsets), LENGTH_CAP)[gram_owner]
+        by_gram = np.argsort(posting_keys, kind='stable')
+        posting_offsets = np.zeros(gram_buckets + 1, dtype=np.int64)
+        np.cumsum(np.bincount(grams, minlength=gram_buckets), out=posting_offsets[1:])
+
+        return cls({
+            'n_records': len(records),
+            'company_names': records['Company Name'].to_numpy(dtype=object),
+            'stack_codes': stacks.codes,
+            'stack_categories': stacks.categories,
+            'legacy_codes': np.asarray(stacks.categories.str.contains('|'.join(map(re.escape, LEGACY_KEYWORDS)), regex=True), dtype=bool),
+            'name_keys': name_keys,
+            'name_records': name_records,
+            'domain_keys': domain_keys,
+            'domain_records': domain_records,
+            'name_chars': name_chars,
+            'name_offsets': name_offsets,
+            'sizes': sizes,
+            'record_keys': record_keys,
+            'gram_buckets': gram_buckets,
+            'posting_offsets': posting_offsets,
+            'posting_keys': posting_keys[by_gram].astype(np.int32),
+            'posting_records': gram_owner[by_gram],
+        })
+
+    # --- Persistence ---
+    @staticmethod
+    def source_signature(kb_file):
+        stat = os.stat(kb_file)
+        return {'version': INDEX_VERSION, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def save(self, index_file):
+        """Writes the index atomically (temp file + rename)."""
+        tmp_file = index_file + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(self.__dict__, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, index_file)
+
+    @classmethod
+    def load(cls, kb_file=KB_FILE, rebuild=False):
+        """
+        Loads the saved index for `kb_file`, rebuilding (and re-saving) it when
+        it is missing or was built from a different version of the file.
+        """
+        index_file = str(kb_file) + INDEX_SUFFIX
+        signature = cls.source_signature(kb_file)
+        if not rebuild and os.path.exists(index_file):
+            try:
+                with open(index_file, 'rb') as f:
+                    state = pickle.load(f)
+                if state.get('signature') == signature:
+                    return cls(state)
+            except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+                pass  # Unreadable index: rebuild it
+
+        records, _ = read_leads_csv(kb_file)
+        kb = cls.build(records)
+        kb.signature = signature
+        try:
+            kb.save(index_file)
+        except OSError:
+            pass  # Read-only location: the in-memory index still works
+        return kb
+
+    # --- Lookups ---
+    def exact_lookup(self, keys, kind='name'):
+        """Record id per normalized name or domain (-1 when absent)."""
+        index, records = (self.name_keys, self.name_records) if kind == 'name' else (self.domain_keys, self.domain_records)
+        positions = index.get_indexer(keys)
+        if not len(records):
+            return positions
+        return np.where(positions >= 0, records[positions], -1)
+
+    def fuzzy_lookup(self, normalized, threshold=MATCH_THRESHOLD):
+        """
+        Best record id and trigram Jaccard similarity per normalized name among
+        records one edit away, or (-1, nan) when none reaches `threshold`.
+        """
+        normalized = np.asarray(normalized, dtype=object)
+        best = np.full(len(normalized), -1, dtype=np.int64)
+        similarity = np.full(len(normalized), np.nan)
+        if not self.n_records or not len(normalized):
+            return best, similarity
+        query_chars, query_offsets = char_buffer(normalized)
+        query_lengths = np.diff(query_offsets)
+        record_lengths = np.diff(self.name_offsets)
+
+        # Probes: each name's PROBE_GRAMS rarest 6-grams (grams absent from the knowledge base first).
+        # A repeated gram may take two probes; it also counts twice for records that have it
+        gram_offsets, grams = probe_sets(normalized, self.gram_buckets, unique=False)
+        frequency = self.posting_offsets[grams + 1] - self.posting_offsets[grams]
+        owner = np.repeat(np.arange(len(normalized), dtype=np.int64), np.diff(gram_offsets))
+        order = np.argsort(owner * (self.n_records + 1) + frequency, kind='stable')
+        owner, grams, frequency = owner[order], grams[order], frequency[order]
+        probe = np.arange(len(owner)) - gram_offsets[owner] < PROBE_GRAMS
+        owner, grams, frequency = owner[probe], grams[probe], frequency[probe]
+
+        # One edit changes at most CANDIDATE_GRAM of a name's 6-grams, so a record within one
+        # edit shares all but that many probes (short names with few probes need just one);
+        # names with too many absent probes have no such record and are skipped
+        required = np.maximum(np.bincount(owner, minlength=len(normalized)) - CANDIDATE_GRAM, 1)
+
+        def viable(owner, frequency):
+            present = np.bincount(owner, weights=frequency > 0, minlength=len(normalized))
+            return (frequency > 0) & (present[owner] >= required[owner])
+
+        probe = viable(owner, frequency)
+        owner, grams = owner[probe], grams[probe]
+
+        # Each probe reads the part of its posting list within one character of the query's
+        # length; probes absent from records of that length don't count either
+        lowest = np.minimum(np.maximum(query_lengths[owner] - 1, 0), LENGTH_CAP)
+        highest = np.minimum(query_lengths[owner] + 1, LENGTH_CAP)
+        first, frequency = search_ranges(self.posting_keys, (grams * (LENGTH_CAP + 1) + lowest).astype(np.int32),
+                                         (grams * (LENGTH_CAP + 1) + highest).astype(np.int32))
+        probe = viable(owner, frequency)
+        owner, first, frequency = owner[probe], first[probe], frequency[probe]
+
+        # Queries are taken in batches of about MAX_CANDIDATES postings to bound memory
+        per_query = np.bincount(owner, weights=frequency, minlength=len(normalized))
+        batch_of = ((np.cumsum(per_query) - per_query) // MAX_CANDIDATES).astype(np.int64)
+
+        for batch in sorted_unique(batch_of):
+            lo, hi = np.searchsorted(batch_of, [batch, batch + 1])
+            start, stop = np.searchsorted(owner, [lo, hi])
+            counts = frequency[start:stop]
+            query = np.repeat(owner[start:stop], counts)
+            record = self.posting_records[spans(first[start:stop], counts)]
+            # Length filter: capped lengths share a posting range, and one edit changes the length by at most one
+            keep = np.abs(record_lengths[record] - query_lengths[query]) <= 1
+            # (query, record) pairs packed as query << 32 | record
+            keys = np.sort((query[keep] << 32) | record[keep])
+            if not len(keys):
+                continue
+
+            # Count filter: keep records sharing enough of the query's probes
+            starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+            shared = np.diff(np.r_[starts, len(keys)])
+            keep = shared >= required[keys[starts] >> 32]
+            keys = keys[starts[keep]]
+            query, record = keys >> 32, keys & 0xFFFFFFFF
+
+            # Edit filter: a typo, not a different word or number
+            keep = one_edit_apart(query_chars, query_offsets, query, self.name_chars, self.name_offsets, record)
+            query, record = query[keep], record[keep]
+            if not len(query):
+                continue
+
+            # Similarity of the few remaining pairs: the query's trigrams present in the record
+            unique_queries = sorted_unique(query)
+            offsets, trigrams = trigram_sets(normalized[unique_queries])
+            local = np.searchsorted(unique_queries, query)
+            q_size, r_size = np.diff(offsets)[local], self.sizes[record]
+            pair = np.repeat(np.arange(len(query)), q_size)
+            probes = record[pair] * N_TRIGRAMS + trigrams[spans(offsets[local], q_size)]
+            found = np.searchsorted(self.record_keys, probes)
+            hits = self.record_keys[np.minimum(found, len(self.record_keys) - 1)] == probes
+            overlap = np.bincount(pair, weights=hits, minlength=len(query))
+            score = overlap / np.maximum(q_size + r_size - overlap, 1)
+
+            # Best record per query (ties go to the earlier record)
+            keep = score >= threshold - 1e-9
+            query, record, score = query[keep], record[keep], score[keep]
+            order = np.lexsort((record, -score, query))
+            winners = order[np.flatnonzero(np.r_[True, query[order][1:] != query[order][:-1]])] if len(order) else order
+            best[query[winners]] = record[winners]
+            similarity[query[winners]] = score[winners]
+
+        return best, similarity
+
+    def join(self, names, websites=None, threshold=MATCH_THRESHOLD):
+        """
+        Batch lookup for many leads: exact domain, then exact name, then fuzzy
+        name. Returns a DataFrame aligned with `names` holding 'kb_company'
+        (the matched record's name), 'tech_stack', 'match_score' (1.0 for
+        exact matches, Jaccard for fuzzy, NaN when unmatched) and 'legacy_flag'.
+        """
+        index = getattr(names, 'index', None)
+        # Each distinct name / domain is normalized and looked up once
+        name_codes, unique_names = factorize_normalized(names, normalize_names)
+        record = self.exact_lookup(unique_names, 'name')
+        score = np.where(record >= 0, 1.0, np.nan)
+
+        fuzzy = np.flatnonzero((record < 0) & (unique_names != ''))
+        if len(fuzzy):
+            record[fuzzy], score[fuzzy] = self.fuzzy_lookup(unique_names[fuzzy], threshold)
+        record, score = record[name_codes], score[name_codes]
+
+        if websites is not None and len(self.domain_keys):
+            domain_codes, unique_domains = factorize_normalized(websites, normalize_domains)
+            by_domain = self.exact_lookup(unique_domains, 'domain')[domain_codes]
+            record = np.where(by_domain >= 0, by_domain, record)
+            score = np.where(by_domain >= 0, 1.0, score)
+
+        matched = record >= 0
+        if not self.n_records:
+            record = np.full(len(record), -1)
+            matched[:] = False
+        codes = np.where(matched, self.stack_codes[np.maximum(record, 0)] if self.n_records else -1, -1)
+        return pd.DataFrame({
+            'kb_company': np.where(matched, self.company_names[np.maximum(record, 0)] if self.n_records else None, None),
+            'tech_stack': pd.Categorical.from_codes(codes, categories=self.stack_categories),
+            'match_score': score,
+            'legacy_flag': matched & (self.legacy_codes[np.maximum(codes, 0)] if len(self.legacy_codes) else False),
+        }, index=index)
+
+@functools.lru_cache(maxsize=None)
+def default_kb():
+    """The knowledge base in KB_FILE, loaded once per process."""
+    return TechStackKB.load(KB_FILE)
+
+# --- 5. Benchmark ---
+def synthetic_names(rng, count):
+    """Random pronounceable company names, e.g. 'Brastelo Quinmar Logistics LLC'."""
+    onsets = ['b', 'br', 'c', 'ch', 'd', 'dr', 'f', 'fl', 'g', 'gr', 'h', 'j', 'k', 'kl', 'l', 'm', 'n',
+              'p', 'pr', 'qu', 'r', 's', 'sh', 'st', 't', 'tr', 'v', 'w', 'y', 'z']
+    vowels = ['a', 'e', 'i', 'o', 'u', 'ai', 'ea', 'ou']
+    codas = ['', '', '', 'n', 'r', 's', 'l', 'm', 'x', 'nd', 'st']
+    syllables = np.array([o + v + c for o in onsets for v in vowels for c in codas])
+    words = [''.join(parts).capitalize() for parts in rng.choice(syllables, (count * 2, 2))]
+    sectors = rng.choice(['Logistics', 'Manufacturing', 'Retail', 'Consulting', 'Software', 'Insurance'], count)
+    suffixes = rng.choice(['Inc.', 'LLC', 'Co.', 'Corp', 'Ltd'], count)
+    return [f"{words[2 * i]} {words[2 * i + 1]} {sectors[i]} {suffixes[i]}" for i in range(count)]
+
+def benchmark(n_records, n_leads, seed=0):
+    """
+    Joins `n_leads` synthetic leads against `n_records` synthetic KB records:
+    40% name variants of KB companies (punctuation/suffix/case), 10% one-typo
+    variants, 20% near neighbours of KB companies that are different companies
+    ('Harbor Consulting Inc.' -> 'Harbor Consulting Group', another sector,
+    a numbered sibling), the rest unknown companies.
+    """
+    rng = np.random.default_rng(seed)
+    kb_names = synthetic_names(rng, n_records)
+    records = pd.DataFrame({
+        'Company Name': kb_names,
+        'Website': [f"{name.split()[0].lower()}{i}.com" for i, name in enumerate(kb_names)],
+        'Tech Stack': rng.choice(['Legacy (AS400 ERP)', 'Modern (AWS Serverless)', 'Hybrid (Custom PHP)'], n_records),
+    })
+
+    start = time.perf_counter()
+    kb = TechStackKB.build(records)
+    build_seconds = time.perf_counter() - start
+
+    n_variants, n_typos, n_near = int(n_leads * 0.4), int(n_leads * 0.1), int(n_leads * 0.2)
+    targets = rng.integers(0, n_records, n_variants + n_typos)
+    names = [kb_names[t].upper().replace(' LLC', ' L.L.C').replace('.', '') for t in targets[:n_variants]]
+    for t in targets[n_variants:]:
+        name = kb_names[t]
+        cut = rng.integers(1, len(name.split()[0]))
+        names.append(name[:cut] + name[cut + 1:])
+    generic_words = ['Group', 'Agency', 'Labs', 'Partners', 'Holdings', 'Solutions', 'Digital', 'Services']
+    sectors = ['Logistics', 'Manufacturing', 'Retail', 'Consulting', 'Software', 'Insurance']
+    for kind, t in zip(rng.integers(0, 4, n_near), rng.integers(0, n_records, n_near)):
+        words = kb_names[t].split()
+        if kind == 0:    # Generic word instead of the legal suffix
+            words[-1] = generic_words[rng.integers(len(generic_words))]
+        elif kind == 1:  # Generic word added
+            words.insert(-1, generic_words[rng.integers(len(generic_words))])
+        elif kind == 2:  # Another sector
+            words[2] = sectors[(sectors.index(words[2]) + rng.integers(1, len(sectors))) % len(sectors)]
+        else:            # Numbered sibling
+            words.insert(2, str(rng.integers(2, 10)))
+        names.append(' '.join(words))
+    names += synthetic_names(np.random.default_rng(seed + 1), n_leads - len(names))
+    leads = pd.Series(names)
+
+    start = time.perf_counter()
+    matches = kb.join(leads)
+    join_seconds = time.perf_counter() - start
+
+    matched = matches['match_score'].notna().to_numpy()
+    # Right company: the match normalizes to the same name as the record the lead was derived from
+    found = normalize_names(matches['kb_company'].iloc[:len(targets)]).to_numpy()
+    expected = normalize_names(records['Company Name'].iloc[targets]).to_numpy()
+    # A near neighbour may coincide with another KB company; only other matches are wrong
+    near = slice(len(targets), len(targets) + n_near)
+    near_wrong = normalize_names(matches['kb_company'].iloc[near]).to_numpy() != normalize_names(leads.iloc[near]).to_numpy()
+    return {
+        'records': n_records,
+        'leads': n_leads,
+        'build_s': round(build_seconds, 2),
+        'join_s': round(join_seconds, 2),
+        'variant_recall': matched[:n_variants].mean(),
+        'typo_recall': matched[n_variants:len(targets)].mean(),
+        'near_matched': (matched[near] & near_wrong).mean(),
+        'unknown_matched': matched[len(targets) + n_near:].mean(),
+        'correct_match': (found == expected)[matched[:len(targets)]].mean(),
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build the tech-stack knowledge base index, or benchmark the join.")
+    parser.add_argument('--kb', default=KB_FILE, help="Knowledge base CSV with 'Company Name', 'Website' and 'Tech Stack'")
+    parser.add_argument('--rebuild', action='store_true', help="Rebuild the saved index even if it is current")
+    parser.add_argument('--benchmark', nargs=2, type=int, metavar=('RECORDS', 'LEADS'),
+                        help="Join LEADS synthetic leads against RECORDS synthetic KB records")
+    args = parser.parse_args()
+
+    try:
+        if args.benchmark:
+            report = benchmark(*args.benchmark)
+            for key, value in report.items():
+                print(f"{key:<16} {value:.3f}" if isinstance(value, float) else f"{key:<16} {value}")
+        else:
+            start = time.perf_counter()
+            kb = TechStackKB.load(args.kb, rebuild=args.rebuild)
+            print(f"Loaded {kb.n_records} knowledge base records in {time.perf_counter() - start:.2f}s.")
+            print(f"Index saved to '{args.kb}{INDEX_SUFFIX}'.")
+    except FileNotFoundError as e:
+        print(f"File error: {e}")
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Knowledge base error: {e}")
+        sys.exit(1)
@@ -0,0 +1,218 @@
+import pandas as pd
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from enrichment_engine import SCRIPT_DIR, enrich_records
+from csv_ingest import INPUT_EXTENSIONS, open_csv_stream, strip_extensions
+
+# Folder the data team drops new vendor CSVs into
+WATCH_DIR = os.path.join(os.path.dirname(SCRIPT_DIR), 'incoming')
+# Partitioned enriched store (one folder per ingest date)
+STORE_DIR = os.path.join(os.path.dirname(SCRIPT_DIR), 'enriched_store')
+# Checkpoint manifest lives next to the store it describes
+MANIFEST_FILE = os.path.join(STORE_DIR, '_manifest.json')
+
+POLL_INTERVAL = 5       # Seconds between directory scans
+SETTLE_SECONDS = 2      # Ignore files modified more recently than this (still being copied)
+MAX_WORKERS = 4         # Files processed concurrently
+CHUNK_ROWS = 50000      # Rows per checkpointed chunk / store part
+
+# --- 1. Checkpoint Manifest ---
+class Manifest:
+    """
+    Thread-safe checkpoint manifest keyed by input path. Each entry records the
+    file hash, how many raw rows have been ingested (offset), the parts written
+    and the processing status, so a restart resumes where it stopped.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+
+    def get(self, key):
+        with self._lock:
+            entry = self.entries.get(key)
+            return dict(entry) if entry else None
+
+    def update(self, key, **fields):
+        with self._lock:
+            entry = self.entries.setdefault(key, {})
+            entry.update(fields)
+            entry['updated_at'] = datetime.now().isoformat(timespec='seconds')
+            self._save()
+
+    def _save(self):
+        # Write to a temp file and swap it in so a crash never leaves a torn manifest
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+def file_hash(path, block_size=1 << 20):
+    """Streams the file through SHA-256 so large drops are never loaded whole."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+# --- 2. Directory Scanning ---
+def scan_for_work(watch_dir, manifest):
+    """
+    Returns (path, stat, hash) for every input file that is new, changed or
+    not yet completed. Size/mtime are compared first so unchanged files are
+    not re-hashed on every poll.
+    """
+    work = []
+    if not os.path.isdir(watch_dir):
+        return work
+
+    now = time.time()
+    for name in sorted(os.listdir(watch_dir)):
+        path = os.path.join(watch_dir, name)
+        if not os.path.isfile(path) or not name.lower().endswith(INPUT_EXTENSIONS):
+            continue
+
+        stat = os.stat(path)
+        if now - stat.st_mtime < SETTLE_SECONDS:
+            continue  # Still being written by the uploader
+
+        entry = manifest.get(path)
+        if entry and entry.get('size') == stat.st_size and entry.get('mtime') == stat.st_mtime:
+            if entry.get('status') == 'completed':
+                continue
+            work.append((path, stat, entry['hash']))
+            continue
+
+        digest = file_hash(path)
+        if entry and entry.get('hash') == digest and entry.get('status') == 'completed':
+            # Touched but identical content: just refresh the cached stat
+            manifest.update(path, size=stat.st_size, mtime=stat.st_mtime)
+            continue
+        work.append((path, stat, digest))
+
+    return work
+
+# --- 3. Incremental Ingestion ---
+def partition_dir(store_dir):
+    """Partition folder for today's ingest."""
+    return os.path.join(store_dir, f"ingest_date={datetime.now():%Y-%m-%d}")
+
+def remove_parts(entry):
+    """Deletes the part files a manifest entry lists (missing ones are ignored)."""
+    for part_name in entry.get('parts', []):
+        try:
+            os.remove(os.path.join(entry['partition'], part_name))
+        except FileNotFoundError:
+            pass
+
+def ingest_file(path, stat, digest, manifest, store_dir, chunk_rows=CHUNK_ROWS):
+    """
+    Enriches one input file chunk by chunk, appending a part file to the store
+    and checkpointing the raw-row offset after every chunk.
+    """
+    entry = manifest.get(path)
+    if entry is None or entry.get('hash') != digest:
+        # New or changed file: the previous version's rows are superseded, so drop
+        # its parts before starting from the top with a fresh checkpoint
+        if entry is not None:
+            remove_parts(entry)
+        entry = {'hash': digest, 'offset': 0, 'parts': [],
+                 'partition': partition_dir(store_dir)}
+    manifest.update(path, hash=digest, size=stat.st_size, mtime=stat.st_mtime,
+                    offset=entry['offset'], parts=entry['parts'],
+                    partition=entry['partition'], status='processing', error=None)
+
+    offset = resume_at = entry['offset']
+    parts = list(entry['parts'])
+    out_dir = entry['partition']
+    os.makedirs(out_dir, exist_ok=True)
+    stem = strip_extensions(path)
+
+    try:
+        # Compressed inputs are decompressed as a stream while chunks are parsed;
+        # skiprows keeps the header (row 0) and skips raw rows already ingested. A
+        # callable, because pandas turns a range into a set of every skipped line number
+        with open_csv_stream(path) as stream:
+            reader = pd.read_csv(stream, chunksize=chunk_rows,
+                                 skiprows=(lambda line: 0 < line <= resume_at) if resume_at else None)
+            for chunk in reader:
+                part_name = f"{stem}-{digest[:12]}-part-{len(parts):05d}.csv"
+                part_path = os.path.join(out_dir, part_name)
+
+                enriched = enrich_records(chunk)
+                tmp_path = part_path + '.tmp'
+                enriched.to_csv(tmp_path, index=False)
+                os.replace(tmp_path, part_path)
+
+                offset += len(chunk)
+                parts.append(part_name)
+                manifest.update(path, offset=offset, parts=parts)
+
+        manifest.update(path, status='completed')
+        print(f"Completed {os.path.basename(path)}: {offset} rows in {len(parts)} part(s).")
+    except pd.errors.EmptyDataError:
+        manifest.update(path, status='completed')
+        print(f"Skipped empty file: {os.path.basename(path)}")
+    except Exception as e:
+        manifest.update(path, status='failed', error=f"{type(e).__name__}: {e}")
+        print(f"Failed {os.path.basename(path)} at row {offset}: {e}")
+
+# --- 4. Watch Loop ---
+def watch(watch_dir=WATCH_DIR, store_dir=STORE_DIR, max_workers=MAX_WORKERS,
+          poll_interval=POLL_INTERVAL, once=False):
+    """
+    Polls `watch_dir` and ingests new or changed files with at most
+    `max_workers` files in flight. With `once=True` a single pass is made.
+    """
+    manifest = Manifest(os.path.join(store_dir, os.path.basename(MANIFEST_FILE)))
+    in_flight = {}
+
+    print(f"Watching '{watch_dir}' -> '{store_dir}' ({max_workers} workers)")
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while True:
+            # Drop finished jobs so their files can be picked up again if changed
+            for key in [k for k, f in in_flight.items() if f.done()]:
+                del in_flight[key]
+
+            for path, stat, digest in scan_for_work(watch_dir, manifest):
+                if path in in_flight:
+                    continue
+                entry = manifest.get(path)
+                if entry and entry.get('hash') == digest and entry.get('status') == 'failed' \
+                        and entry.get('mtime') == stat.st_mtime:
+                    continue  # Don't retry a failed file until it changes
+                in_flight[path] = pool.submit(ingest_file, path, stat, digest, manifest, store_dir)
+
+            if once:
+                for future in in_flight.values():
+                    future.result()
+                break
+            time.sleep(poll_interval)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Watch a folder and incrementally enrich new lead files.")
+    parser.add_argument('--input', default=WATCH_DIR, help="Directory to watch for new CSV files")
+    parser.add_argument('--store', default=STORE_DIR, help="Partitioned output store directory")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS, help="Maximum files processed concurrently")
+    parser.add_argument('--interval', type=float, default=POLL_INTERVAL, help="Seconds between directory scans")
+    parser.add_argument('--once', action='store_true', help="Process pending files once and exit")
+    args = parser.parse_args()
+
+    try:
+        watch(args.input, args.store, args.workers, args.interval, args.once)
+    except KeyboardInterrupt:
+        print("\nStopping watcher. Progress is checkpointed in the manifest.")
+        sys.exit(0)
@@ -0,0 +1,175 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import json
+import time
+import argparse
+import itertools
+
+from enrichment_engine import OUTPUT_FILE, SCORE_WEIGHTS, TRADITIONAL_INDUSTRIES, HIGH_PRIORITY_SCORE
+from csv_ingest import read_leads_csv
+
+# Rule order shared by the indicator matrix and the weight matrix
+RULES = list(SCORE_WEIGHTS)
+# Working memory allowed per chunk of rows (scores, masks and top-k keys for every config)
+MAX_CHUNK_BYTES = 64 * 1024 * 1024
+BYTES_PER_CELL = 40
+TOP_K = 100
+REPORT_FILE = os.path.join(os.path.dirname(OUTPUT_FILE), 'what_if_report.csv')
+
+# --- 1. Rule Indicators ---
+def rule_indicators(df):
+    """
+    Builds the N x R 0/1 matrix of which scoring rules fire for each enriched
+    lead, in RULES order. Computed once and reused for every configuration.
+    """
+    years = pd.to_numeric(df['Years in Business'], errors='coerce').to_numpy(dtype=float)
+    revenue = pd.to_numeric(df['Annual Revenue (USD)'], errors='coerce').to_numpy(dtype=float)
+
+    # NaNs compare False, matching the .loc rules in calculate_ai_score
+    with np.errstate(invalid='ignore'):
+        indicators = {
+            'base': np.ones(len(df), dtype=bool),
+            'age_20_plus': years >= 20,
+            'age_10_to_19': (years >= 10) & (years < 20),
+            'age_under_5': years < 5,
+            'revenue_sweet_spot': (revenue >= 3000000) & (revenue <= 10000000),
+            'revenue_outside': (revenue > 10000000) | (revenue < 3000000),
+            'traditional_industry': df['Industry'].isin(TRADITIONAL_INDUSTRIES).to_numpy(dtype=bool),
+            'legacy_tech': (df['Legacy_Tech_Flag'] == True).to_numpy(dtype=bool),
+        }
+    return np.column_stack([indicators[rule] for rule in RULES]).astype(np.float32)
+
+# --- 2. Configurations ---
+def config_name(config):
+    """Readable label listing only what differs from the baseline."""
+    changes = [f"{rule}={config[rule]:g}" for rule in RULES if config[rule] != SCORE_WEIGHTS[rule]]
+    if config['threshold'] != HIGH_PRIORITY_SCORE:
+        changes.append(f"threshold={config['threshold']:g}")
+    return ', '.join(changes) or 'baseline'
+
+def normalize_configs(configs):
+    """
+    Fills each config (a dict of any subset of rule weights plus an optional
+    'threshold' and 'name') from the baseline weights.
+    """
+    normalized = []
+    for config in configs:
+        unknown = set(config) - set(RULES) - {'threshold', 'name'}
+        if unknown:
+            raise ValueError(f"Unknown scoring rule(s): {', '.join(sorted(unknown))}. Expected: {', '.join(RULES)}")
+        full = {**SCORE_WEIGHTS, 'threshold': HIGH_PRIORITY_SCORE, **config}
+        full['name'] = config.get('name') or config_name(full)
+        normalized.append(full)
+    return normalized
+
+def weight_grid(thresholds=(HIGH_PRIORITY_SCORE,), **weight_ranges):
+    """Every combination of the given weight values and High Priority thresholds."""
+    rules = list(weight_ranges)
+    for values in itertools.product(*(weight_ranges[rule] for rule in rules)):
+        for threshold in thresholds:
+            yield {**dict(zip(rules, values)), 'threshold': threshold}
+
+# --- 3. Batch Scoring ---
+def what_if(df, configs, top_k=TOP_K, max_chunk_bytes=MAX_CHUNK_BYTES):
+    """
+    Scores every lead under K weight configurations in one pass.
+
+    Scores are (N x R indicators) @ (R x K weights), clipped and rounded like
+    the engine, computed in row chunks sized to `max_chunk_bytes`. Returns one
+    row per config (baseline first) with its High Priority count and share,
+    average score, Jaccard overlap of its High Priority set with the
+    baseline's, and overlap of its top-`top_k` leads with the baseline's.
+    """
+    configs = normalize_configs([{'name': 'baseline'}] + list(configs))
+    weights = np.array([[config[rule] for config in configs] for rule in RULES], dtype=np.float32)
+    thresholds = np.array([config['threshold'] for config in configs], dtype=np.float32)
+    n_configs = len(configs)
+
+    indicators = rule_indicators(df)
+    n_rows = len(indicators)
+    top_k = min(max(1, top_k), n_rows)  # 0 for an empty input
+    chunk_rows = max(1, max_chunk_bytes // (BYTES_PER_CELL * n_configs))
+
+    high_counts = np.zeros(n_configs, dtype=np.int64)
+    overlap_with_baseline = np.zeros(n_configs, dtype=np.int64)
+    score_sums = np.zeros(n_configs, dtype=np.float64)
+    # Running top-k per config, as sortable keys: score first, earlier rows win ties
+    top_keys = np.full((top_k, n_configs), -1, dtype=np.int64)
+
+    for start in range(0, n_rows, chunk_rows):
+        block = indicators[start:start + chunk_rows]
+        scores = np.clip(np.rint(block @ weights), 0, 100)
+
+        high = scores >= thresholds
+        high_counts += high.sum(axis=0)
+        overlap_with_baseline += (high & high[:, :1]).sum(axis=0)
+        score_sums += scores.sum(axis=0, dtype=np.float64)
+
+        row_ids = np.arange(start, start + len(block), dtype=np.int64)
+        keys = scores.astype(np.int64) * n_rows + (n_rows - 1 - row_ids)[:, None]
+        candidates = np.vstack([top_keys, keys])
+        top_keys = -np.partition(-candidates, top_k - 1, axis=0)[:top_k]
+
+    top_rows = (n_rows - 1) - (top_keys % n_rows) if n_rows else top_keys
+    baseline_top = top_rows[:, 0]
+    union = high_counts + high_counts[0] - overlap_with_baseline
+
+    report = pd.DataFrame({
+        'name': [config['name'] for config in configs],
+        'threshold': thresholds,
+        'high_priority_count': high_counts,
+        'high_priority_share': high_counts / max(n_rows, 1),
+        'avg_score': score_sums / max(n_rows, 1),
+        'jaccard_vs_baseline': np.divide(overlap_with_baseline, union,
+                                         out=np.ones(n_configs), where=union > 0),
+        'top_k_overlap': [np.isin(top_rows[:, k], baseline_top).mean() if top_k else 1.0
+                          for k in range(n_configs)],
+    })
+    for rule in RULES:
+        report[rule] = [config[rule] for config in configs]
+    return report
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Score enriched leads under many weight/threshold configurations.")
+    parser.add_argument('--input', default=OUTPUT_FILE, help="Enriched leads CSV (output of enrichment_engine.py)")
+    parser.add_argument('--configs', help="JSON file with a list of configs, e.g. [{\"legacy_tech\": 25, \"threshold\": 80}]")
+    parser.add_argument('--top-k', type=int, default=TOP_K, help="Leads compared for rank overlap")
+    parser.add_argument('--output', default=REPORT_FILE, help="Where to write the per-config report")
+    args = parser.parse_args()
+
+    try:
+        if args.configs:
+            with open(args.configs, 'r', encoding='utf-8') as f:
+                configs = json.load(f)
+        else:
+            # Default sensitivity grid around the baseline weights
+            configs = list(weight_grid(
+                thresholds=(60, 70, 80, 90),
+                age_20_plus=(10, 20, 30),
+                revenue_sweet_spot=(5, 15, 25),
+                traditional_industry=(0, 10, 20),
+                legacy_tech=(5, 15, 25),
+            ))
+
+        df, _ = read_leads_csv(args.input)
+        start = time.perf_counter()
+        report = what_if(df, configs, top_k=args.top_k)
+        elapsed = time.perf_counter() - start
+
+        report.to_csv(args.output, index=False)
+        print(f"Scored {len(df)} leads under {len(configs)} configurations in {elapsed:.2f}s.")
+        print(f"Report saved to '{args.output}'.")
+
+        print("\nLARGEST SHIFTS IN THE HIGH PRIORITY SET (lowest Jaccard vs baseline):\n")
+        summary_columns = ['name', 'high_priority_count', 'jaccard_vs_baseline', 'top_k_overlap']
+        print(report.nsmallest(10, 'jaccard_vs_baseline')[summary_columns].to_string(index=False))
+
+    except FileNotFoundError as e:
+        print(f"File error: {e}")
+        print("Run enrichment_engine.py first to produce the enriched leads file.")
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Configuration error: {e}")
+        sys.exit(1)
@@ -5,10 +5,27 @@ from io import BytesIO
 import os
 import requests
 import json
+import time
+import hashlib
+import tempfile
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from dataset_store import SharedDatasetStore, dataset_fingerprint, DEFAULT_SPILL_DIR
+from Engine.csv_ingest import read_leads_csv, format_ingest_stats, UPLOAD_TYPES
+from lead_pipeline import REQUIRED_COLUMNS, PIPELINE_VERSION, process_uploaded_data, score_upload_task, export_task
+from job_queue import JobManager, ACTIVE_STATUSES, POLL_INTERVAL
 
 # Clearbit API Configuration (Free tier: 50 requests/month)
 CLEARBIT_API_KEY = "sk_test_clearbit_key"  # Replace with actual key or use free tier
 
+# Uploads at least this large are scored by a background job instead of inside the rerun
+BACKGROUND_SCORING_MIN_BYTES = 5 * 1024 * 1024
+# Exports with more rows than this are built by a background job
+BACKGROUND_EXPORT_MIN_ROWS = 20000
+# Rows rendered in the results table (pandas' Styler refuses very large frames); exports include all
+MAX_DISPLAY_ROWS = 5000
+# Uploads and export artifacts handed to background jobs
+JOB_FILES_DIR = os.path.join(tempfile.gettempdir(), 'caprae_jobs')
+
 # Set up the Streamlit page
 st.set_page_config(
     page_title="Caprae LeadGen Dashboard",
@@ -16,129 +33,202 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# --- AI Scoring Functions ---
-def calculate_ai_score(df):
-    """Calculate AI Acquisition Score based on M&A fit criteria"""
-    df = df.copy()
-    df['AI_Acquisition_Score'] = 50  # Base score
-    
-    # Age bonus (older companies need modernization)
-    df.loc[df['Years in Business'] >= 20, 'AI_Acquisition_Score'] += 20
-    df.loc[(df['Years in Business'] >= 10) & (df['Years in Business'] < 20), 'AI_Acquisition_Score'] += 10
-    df.loc[df['Years in Business'] < 5, 'AI_Acquisition_Score'] -= 10
-    
-    # Revenue sweet spot ($3M-$10M)
-    df['Annual Revenue (USD)'] = df['Annual Revenue (USD)'].astype(str).str.replace(r'[$,"]', '', regex=True)
-    df['Annual Revenue (USD)'] = pd.to_numeric(df['Annual Revenue (USD)'], errors='coerce')
-    
-    df.loc[(df['Annual Revenue (USD)'] >= 3000000) & (df['Annual Revenue (USD)'] <= 10000000), 'AI_Acquisition_Score'] += 15
-    df.loc[(df['Annual Revenue (USD)'] > 10000000) | (df['Annual Revenue (USD)'] < 3000000), 'AI_Acquisition_Score'] -= 5
-    
-    # Industry focus (traditional industries)
-    traditional_industries = ['Manufacturing', 'Retail', 'Consulting', 'Agency', 'Traditional Consulting', 'Logistics', 'Accounting', 'Insurance', 'Environmental']
-    df.loc[df['Industry'].isin(traditional_industries), 'AI_Acquisition_Score'] += 10
-    
-    return df
+# --- Shared Dataset Store ---
+@st.cache_resource
+def get_dataset_store():
+    """One store per server process, shared by every session."""
+    return SharedDatasetStore(spill_dir=DEFAULT_SPILL_DIR, version=PIPELINE_VERSION)
 
-def add_tech_flag(df):
-    """Add legacy technology detection"""
-    df = df.copy()
-    
-    # Simulate tech stack detection based on company characteristics
-    df['Legacy_Tech_Flag'] = False
-    df['simulated_tech_stack'] = 'Modern (Cloud-based)'
-    
-    # Legacy tech indicators: older companies in traditional industries
-    legacy_conditions = (
-        (df['Years in Business'] >= 15) & 
-        (df['Industry'].isin(['Manufacturing', 'Accounting', 'Insurance', 'Logistics']))
-    ) | (df['Years in Business'] >= 25)
-    
-    df.loc[legacy_conditions, 'Legacy_Tech_Flag'] = True
-    df.loc[legacy_conditions, 'simulated_tech_stack'] = 'Legacy (On-Premise Systems)'
-    
-    # Bonus for legacy tech
-    df.loc[df['Legacy_Tech_Flag'] == True, 'AI_Acquisition_Score'] += 15
-    
-    # Clip scores to 0-100
-    df['AI_Acquisition_Score'] = df['AI_Acquisition_Score'].clip(0, 100).round().astype(int)
-    
-    return df
+# --- Background Jobs ---
+@st.cache_resource
+def get_job_manager():
+    """One worker pool and job registry per server process, shared by every session."""
+    return JobManager()
 
-def map_columns(df):
-    """Intelligently map column names to standard format"""
-    column_mapping = {
-        # Company Name variations
-        'company_name': 'Company Name', 'company': 'Company Name', 'business_name': 'Company Name',
-        'organization': 'Company Name', 'firm': 'Company Name', 'entity': 'Company Name',
-        'name': 'Company Name', 'client': 'Company Name', 'business': 'Company Name',
-        
-        # Contact Name variations
-        'contact_name': 'Contact Name', 'contact': 'Contact Name', 'person': 'Contact Name',
-        'representative': 'Contact Name', 'lead': 'Contact Name', 'owner': 'Contact Name',
-        'manager': 'Contact Name', 'ceo': 'Contact Name', 'founder': 'Contact Name',
-        
-        # Website variations
-        'website': 'Website', 'url': 'Website', 'web': 'Website', 'site': 'Website',
-        'homepage': 'Website', 'domain': 'Website', 'link': 'Website',
-        
-        # Industry variations
-        'industry': 'Industry', 'sector': 'Industry', 'vertical': 'Industry',
-        'business_type': 'Industry', 'category': 'Industry', 'field': 'Industry',
-        'market': 'Industry', 'niche': 'Industry',
-        
-        # Revenue variations
-        'annual_revenue': 'Annual Revenue (USD)', 'revenue': 'Annual Revenue (USD)',
-        'sales': 'Annual Revenue (USD)', 'turnover': 'Annual Revenue (USD)',
-        'income': 'Annual Revenue (USD)', 'earnings': 'Annual Revenue (USD)',
-        'annual_sales': 'Annual Revenue (USD)', 'yearly_revenue': 'Annual Revenue (USD)',
-        
-        # Years in Business variations
-        'years_in_business': 'Years in Business', 'age': 'Years in Business',
-        'company_age': 'Years in Business', 'years_operating': 'Years in Business',
-        'established': 'Years in Business', 'founded': 'Years in Business',
-        'years_active': 'Years in Business', 'business_age': 'Years in Business'
-    }
-    
-    # Create a copy and normalize column names
-    df_mapped = df.copy()
-    df_mapped.columns = df_mapped.columns.str.lower().str.replace(' ', '_').str.replace('(', '').str.replace(')', '').str.replace('-', '_')
-    
-    # Apply mapping
-    df_mapped = df_mapped.rename(columns=column_mapping)
-    
-    # Fill missing columns with defaults
-    required_columns = ['Company Name', 'Contact Name', 'Website', 'Industry', 'Annual Revenue (USD)', 'Years in Business']
-    for col in required_columns:
-        if col not in df_mapped.columns:
-            if col == 'Contact Name':
-                df_mapped[col] = 'N/A'
-            elif col == 'Website':
-                df_mapped[col] = 'N/A'
-            elif col == 'Industry':
-                df_mapped[col] = 'General'
-            elif col == 'Annual Revenue (USD)':
-                df_mapped[col] = 1000000  # Default 1M
-            elif col == 'Years in Business':
-                df_mapped[col] = 5  # Default 5 years
-    
-    return df_mapped[required_columns]
-
-def process_uploaded_data(df):
-    """Process uploaded dataset and return enriched data"""
-    # Map columns intelligently
-    df_mapped = map_columns(df)
-    
-    # Clean data
-    df_cleaned = df_mapped.dropna(subset=['Years in Business']).copy()
-    df_cleaned = df_cleaned[pd.to_numeric(df_cleaned['Years in Business'], errors='coerce').notna()].copy()
-    df_cleaned['Years in Business'] = pd.to_numeric(df_cleaned['Years in Business'], errors='coerce')
-    
-    # Apply scoring
-    df_scored = calculate_ai_score(df_cleaned)
-    df_enriched = add_tech_flag(df_scored)
-    
-    return df_enriched
+def render_job(job, label, restart):
+    """
+    Shows a queued/running job's progress with a Cancel button, or why it
+    stopped with a Restart button (which calls `restart`). Returns True while
+    the job is still active.
+    """
+    status = job.status
+    if status == 'cancelling':
+        st.progress(job.progress, text=f"✖️ {label}: cancelling, waiting for the worker to stop...")
+        return True
+    if status in ACTIVE_STATUSES:
+        st.progress(job.progress, text=f"🔄 {label}: {job.message}")
+        if st.button("✖️ Cancel", key=f"cancel_{label}", use_container_width=True):
+            get_job_manager().cancel(job.key)
+            st.rerun()
+        return True
+    
+    if status == 'failed':
+        st.error(f"❌ {label} failed: {job.error}")
+    elif status == 'cancelled':
+        st.warning(f"⚠️ {label} was cancelled.")
+    if status != 'done' and st.button("🔁 Restart", key=f"restart_{label}", use_container_width=True):
+        restart()
+        st.rerun()
+    return False
+
+def render_progressive_preview(estimates):
+    """Approximate Quick Stats and top leads published by a running scoring job."""
+    st.markdown("### ⏳ Quick Stats (preview)")
+    st.caption(f"Estimated from a random sample and the {estimates['rows_scored']:,} of "
+               f"{estimates['total_rows']:,} rows scored so far. Ranges are 95% confidence "
+               f"intervals and narrow as scoring proceeds.")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    cards = [
+        (col1, "Total Leads", 'total_leads', "{:,.0f}", "Estimated companies in database"),
+        (col2, "Avg AI Score", 'avg_score', "{:.1f}", "Estimated average acquisition score"),
+        (col3, "Legacy Tech", 'legacy_share', "{:.1%}", "Estimated share of companies with legacy systems"),
+        (col4, "High Priority", 'high_priority', "{:,.0f}", "Estimated scores 90+ (immediate action)"),
+    ]
+    for col, label, key, number_format, help_text in cards:
+        estimate, low, high = estimates[key]
+        with col:
+            st.metric(label, "~" + number_format.format(estimate), help=help_text)
+            st.caption(f"95% CI: {number_format.format(low)} – {number_format.format(high)}")
+    
+    st.markdown("#### 🏆 Top Leads So Far")
+    st.dataframe(pd.DataFrame(estimates['top_leads']), hide_index=True, width='stretch')
+
+def poll_jobs():
+    """Reruns the script shortly so job progress refreshes."""
+    time.sleep(POLL_INTERVAL)
+    st.rerun()
+
+def save_upload(uploaded, dataset_key):
+    """
+    Writes the uploaded bytes to a new file for one job worker to read. Each
+    job gets its own copy, since a job deletes its upload when it ends.
+    """
+    directory = os.path.join(JOB_FILES_DIR, 'uploads')
+    os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=directory, prefix=f"{dataset_key}_", suffix=f"_{os.path.basename(uploaded.name)}")
+    with os.fdopen(fd, 'wb') as f:
+        f.write(uploaded.getvalue())
+    return path
+
+def upload_fingerprint(source):
+    """
+    dataset_fingerprint of the source. An upload is hashed once and cached
+    by its file_id, so reruns (e.g. polling a job) don't re-hash the file.
+    """
+    file_id = getattr(source, 'file_id', None)
+    if file_id is None:
+        return dataset_fingerprint(source)
+    cached = st.session_state.get('upload_fingerprint')
+    if cached is None or cached[0] != file_id:
+        cached = (file_id, dataset_fingerprint(source))
+        st.session_state['upload_fingerprint'] = cached
+    return cached[1]
+
+def load_shared_dataset(source):
+    """
+    Returns (enriched_df, meta) for an upload or generated DataFrame, reusing
+    the copy already held by another session when the content is identical.
+    
+    Large uploads are scored by a background job; until it finishes this
+    shows the job's progress and approximate Quick Stats, and ends the rerun
+    (polling while it runs).
+    """
+    store = get_dataset_store()
+    dataset_key = upload_fingerprint(source)
+    ctx = get_script_run_ctx()
+    session_id = ctx.session_id if ctx is not None else 'local'
+
+    # Release the previous dataset when this session switches to a new one
+    previous_key = st.session_state.get('dataset_key')
+    if previous_key and previous_key != dataset_key:
+        store.release(previous_key, session_id)
+    st.session_state['dataset_key'] = dataset_key
+
+    def build():
+        # Held in a list so the pipeline receives the only reference to a parsed upload
+        if isinstance(source, pd.DataFrame):
+            raw, ingest_stats = [source], None
+        else:
+            # Compressed uploads are inflated as a stream; large files use the pyarrow reader
+            source.seek(0)
+            df_read, ingest_stats = read_leads_csv(source, name=source.name)
+            raw = [df_read]
+            del df_read
+        meta = {
+            'source_rows': int(len(raw[0])),
+            'original_columns': [str(col) for col in raw[0].columns],
+            'ingest': ingest_stats,
+        }
+        with st.spinner('🔄 Processing data and calculating AI scores...'):
+            return process_uploaded_data(raw.pop()), meta
+
+    is_large_upload = not isinstance(source, pd.DataFrame) and source.size >= BACKGROUND_SCORING_MIN_BYTES
+    if is_large_upload and not store.contains(dataset_key):
+        # Identical uploads from any session share one scoring job; the upload
+        # is only written out when a job is started, and the job deletes it
+        jobs = get_job_manager()
+        def submit(restart=False):
+            upload_path = save_upload(source, dataset_key)
+            job = jobs.submit(
+                ('score', dataset_key), score_upload_task,
+                upload_path, source.name, store.dataset_path(dataset_key),
+                restart=restart, files=[upload_path]
+            )
+            if upload_path not in job.files:
+                os.remove(upload_path)  # Another session's job got there first
+            return job
+        job = jobs.get(('score', dataset_key)) or submit()
+        if job.status != 'done':
+            active = render_job(job, 'Scoring', lambda: submit(restart=True))
+            if active and job.partial:
+                # Approximate figures from the job's sample, refined chunk by chunk
+                render_progressive_preview(job.partial)
+            if active:
+                poll_jobs()
+            st.stop()
+
+    return store.acquire(dataset_key, session_id, build)
+
+def render_export(fmt, df, export_params):
+    """
+    Download button for the filtered results. Small exports are built inline;
+    large ones are built by a background job keyed by dataset, filters and
+    format. Returns True while that job is still running.
+    """
+    label, mime, icon = {
+        'csv': ('CSV Export', 'text/csv', '📄'),
+        'xlsx': ('Excel Export', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', '📊'),
+    }[fmt]
+    file_name = f'caprae_leads_{len(df)}_results.{fmt}'
+    help_text = "Download as CSV for analysis" if fmt == 'csv' else "Download as Excel spreadsheet"
+    
+    if len(df) <= BACKGROUND_EXPORT_MIN_ROWS:
+        data = to_csv_download(df) if fmt == 'csv' else to_excel_download(df)
+        st.download_button(label=f"{icon} {label}", data=data, file_name=file_name, mime=mime,
+                           help=help_text, use_container_width=True)
+        return False
+    
+    jobs = get_job_manager()
+    job_key = ('export', st.session_state['dataset_key'], export_params, fmt)
+    output_path = os.path.join(JOB_FILES_DIR, 'exports',
+                               f"{hashlib.sha256(repr(job_key).encode('utf-8')).hexdigest()[:16]}.{fmt}")
+    
+    def submit(restart=False):
+        return jobs.submit(job_key, export_task, df, fmt, output_path, restart=restart, files=[output_path])
+    
+    job = jobs.get(job_key)
+    if job is None:
+        if not st.button(f"⚙️ Prepare {label}", key=f"prepare_{fmt}", help=help_text, use_container_width=True):
+            return False
+        job = submit()
+    
+    if job.status == 'done':
+        with open(job.result, 'rb') as f:
+            st.download_button(label=f"{icon} {label}", data=f.read(), file_name=file_name, mime=mime,
+                               help=help_text, use_container_width=True)
+        return False
+    return render_job(job, label, lambda: submit(restart=True))
 
 # --- Free Company Search API ---
 def search_companies_free(industry, location, num_results=10):
@@ -339,8 +429,8 @@ with tab1:
     
     uploaded_file = st.file_uploader(
         "Choose a CSV file", 
-        type="csv",
-        help="Upload your company dataset to get AI acquisition scores"
+        type=UPLOAD_TYPES,
+        help="Upload your company dataset (.csv, or compressed .csv.gz / .zip / .zst) to get AI acquisition scores"
     )
     
     # Sample data option
@@ -393,25 +483,23 @@ with tab2:
             else:
                 st.warning("⚠️ Unable to find companies. Please try again.")
                 uploaded_file = None
-    else:
-        uploaded_file = None
 
 # Process data from either source
+jobs_active = False
 if uploaded_file is not None and not (isinstance(uploaded_file, pd.DataFrame) and uploaded_file.empty):
     try:
-        # Read the uploaded file
-        if isinstance(uploaded_file, pd.DataFrame):
-            df = uploaded_file
-        else:
-            df = pd.read_csv(uploaded_file)
+        # Read and enrich the upload, or reuse the shared copy another session built
+        # (the shared DataFrame is read-only: filters below only take selections)
+        df, dataset_meta = load_shared_dataset(uploaded_file)
         
-        st.success(f"✅ Dataset loaded successfully! Found {len(df)} companies.")
+        st.success(f"✅ Dataset loaded successfully! Found {dataset_meta['source_rows']} companies.")
+        if dataset_meta.get('ingest'):
+            st.caption(f"📥 Read {format_ingest_stats(dataset_meta['ingest'])}")
         
         # Show column mapping
         with st.expander("🔍 Column Mapping Results", expanded=False):
-            original_cols = list(df.columns)
-            mapped_df = map_columns(df)
-            mapped_cols = list(mapped_df.columns)
+            original_cols = dataset_meta['original_columns']
+            mapped_cols = REQUIRED_COLUMNS
             
             col1, col2 = st.columns(2)
             with col1:
@@ -423,15 +511,11 @@ if uploaded_file is not None and not (isinstance(uploaded_file, pd.DataFrame) an
                 for col in mapped_cols:
                     st.write(f"• {col}")
         
-        # Process the data
-        with st.spinner('🔄 Processing data and calculating AI scores...'):
-            df = process_uploaded_data(df)
-        
         # Display processing results
         st.markdown("---")
         st.markdown("### ✨ Processing Complete!")
         
-        df_display = df.copy()
+        df_display = df
         
         # --- Quick Stats Cards ---
         col1, col2, col3, col4 = st.columns(4)
@@ -542,14 +626,6 @@ if uploaded_file is not None and not (isinstance(uploaded_file, pd.DataFrame) an
             elif sort_by == "Revenue":
                 df_filtered = df_filtered.sort_values(by='Annual Revenue (USD)', ascending=False)
             
-            # Better column formatting
-            df_display_ordered = df_filtered.copy()
-            
-            # Format revenue for better readability
-            df_display_ordered['Revenue'] = df_display_ordered['Annual Revenue (USD)'].apply(
-                lambda x: f"${x:,.0f}" if pd.notnull(x) else "N/A"
-            )
-            
             # Rename columns for better UX
             column_renames = {
                 'AI_Acquisition_Score': '🎯 AI Score',
@@ -560,9 +636,17 @@ if uploaded_file is not None and not (isinstance(uploaded_file, pd.DataFrame) an
                 'simulated_tech_stack': '⚙️ Tech Stack'
             }
             
-            # Select and rename columns
+            # Build the display frame from the displayed columns and rows only (no full copy of the
+            # results) and format revenue for better readability
+            df_shown = df_filtered.head(MAX_DISPLAY_ROWS)
+            if len(df_filtered) > MAX_DISPLAY_ROWS:
+                st.caption(f"Showing the first {MAX_DISPLAY_ROWS:,} of {len(df_filtered):,} leads. Export to get them all.")
             display_columns = ['🎯 AI Score', '💻 Legacy Tech', '🏢 Company', '👤 Contact', '🏭 Industry', 'Revenue', '⚙️ Tech Stack']
-            df_display_final = df_display_ordered.rename(columns=column_renames)[display_columns]
+            display_data = {label: df_shown[col] for col, label in column_renames.items()}
+            display_data['Revenue'] = df_shown['Annual Revenue (USD)'].apply(
+                lambda x: f"${x:,.0f}" if pd.notnull(x) else "N/A"
+            )
+            df_display_final = pd.DataFrame({label: display_data[label] for label in display_columns}, copy=False)
             
             st.dataframe(
                 df_display_final.style.map(
@@ -578,27 +662,13 @@ if uploaded_file is not None and not (isinstance(uploaded_file, pd.DataFrame) an
             
             col1, col2, col3 = st.columns([1, 1, 2])
             
+            # Large exports run as background jobs keyed by the current filters
+            export_params = (score_min, score_max, tech_filter, industry_filter, sort_by)
             with col1:
-                csv_data = to_csv_download(df_filtered)
-                st.download_button(
-                    label="📄 CSV Export",
-                    data=csv_data,
-                    file_name=f'caprae_leads_{len(df_filtered)}_results.csv',
-                    mime='text/csv',
-                    help="Download as CSV for analysis",
-                    use_container_width=True
-                )
+                jobs_active = render_export('csv', df_filtered, export_params) or jobs_active
             
             with col2:
-                excel_data = to_excel_download(df_filtered)
-                st.download_button(
-                    label="📊 Excel Export",
-                    data=excel_data,
-                    file_name=f'caprae_leads_{len(df_filtered)}_results.xlsx',
-                    mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                    help="Download as Excel spreadsheet",
-                    use_container_width=True
-                )
+                jobs_active = render_export('xlsx', df_filtered, export_params) or jobs_active
             
             with col3:
                 st.info(f"💡 **Export includes {len(df_filtered)} filtered leads** with all data fields for further analysis.")
@@ -657,4 +727,8 @@ st.sidebar.markdown("""
         <li>Export results for CRM integration</li>
     </ul>
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+# Keep refreshing while an export job runs
+if jobs_active:
+    poll_jobs()
@@ -0,0 +1,290 @@
+# dataset_store.py
+import os
+import json
+import time
+import pickle
+import hashlib
+import tempfile
+import threading
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow is optional; without it the store is in-process only
+    pa = None
+    feather = None
+
+SESSION_TTL = 30 * 60     # Drop a session's reference after 30 minutes without a rerun
+IDLE_TTL = 10 * 60        # Evict unreferenced datasets after 10 idle minutes
+DEFAULT_SPILL_DIR = os.path.join(tempfile.gettempdir(), 'caprae_dataset_store')
+
+
+def dataset_fingerprint(source):
+    """
+    Content hash for an uploaded file (anything with getvalue()) or an
+    in-memory DataFrame, used as the shared store key.
+    """
+    digest = hashlib.sha256()
+    if isinstance(source, pd.DataFrame):
+        digest.update(','.join(map(str, source.columns)).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(source, index=False).values.tobytes())
+    else:
+        digest.update(source.getvalue())
+    return digest.hexdigest()
+
+
+def save_dataset(path, df, meta):
+    """
+    Writes an enriched dataset and its meta to `path`: an uncompressed Arrow
+    file for '.arrow' paths, a pickle otherwise.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + f'.{os.getpid()}.tmp'
+    if path.endswith('.arrow'):
+        table = pa.Table.from_pandas(df, preserve_index=True)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            b'caprae_meta': json.dumps(meta).encode('utf-8'),
+        })
+        # One record batch: columns split across batches are copied when loaded
+        feather.write_feather(table, tmp_path, compression='uncompressed', chunksize=max(len(df), 1))
+    else:
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((df, meta), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+def load_dataset(path):
+    """Reads (df, meta) written by save_dataset; Arrow files are memory-mapped."""
+    if path.endswith('.arrow'):
+        # Uncompressed single-batch Arrow files are memory-mapped: numeric columns
+        # (and, on pandas 3, text columns) are views of the file's pages, which
+        # worker processes share through the OS page cache. Bool columns and
+        # categorical codes are copied (1 byte per row each); on pandas 2, text
+        # columns become private object arrays
+        table = feather.read_table(path, memory_map=True)
+        meta = json.loads(table.schema.metadata.get(b'caprae_meta', b'{}'))
+        return table.to_pandas(split_blocks=True), meta
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+class SharedDatasetStore:
+    """
+    Process-wide store holding one enriched DataFrame per dataset content hash.
+
+    Sessions acquire a dataset by key and get back the shared, read-only
+    DataFrame instead of a private copy. Each entry tracks which sessions
+    reference it; entries nobody has touched for IDLE_TTL are evicted. When
+    pyarrow is installed, built datasets are also written to an Arrow file
+    so other worker processes can memory-map them instead of re-running the
+    pipeline.
+
+    Dataset files are named by content hash and `version` (bump it whenever
+    the pipeline's output changes, so files written by older code are never
+    served). Every process holding a dataset leaves a reference marker next
+    to its file; the file is deleted once the last process evicts it, and
+    unreferenced files older than IDLE_TTL are swept.
+    """
+
+    def __init__(self, session_ttl=SESSION_TTL, idle_ttl=IDLE_TTL, spill_dir=None, version=0):
+        self.session_ttl = session_ttl
+        self.idle_ttl = idle_ttl
+        self.spill_dir = spill_dir if pa is not None else None
+        self.version = version
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._build_locks = {}
+
+    # --- Public API ---
+    def acquire(self, key, session_id, build):
+        """
+        Returns (df, meta) for `key`, calling `build()` -> (df, meta) only if
+        no process has built it yet. Concurrent sessions asking for the same
+        key wait on a single build.
+        """
+        self.evict_idle()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                build_lock = self._build_locks.setdefault(key, threading.Lock())
+            else:
+                return self._touch(entry, session_id)
+
+        with build_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    return self._touch(entry, session_id)
+
+            # Referenced before loading so no other process deletes the file meanwhile
+            self._add_ref(key)
+            try:
+                df, meta = self._load_spilled(key) or build()
+            except BaseException:
+                self._drop_ref(key)
+                raise
+
+            with self._lock:
+                entry = {
+                    'df': df,
+                    'meta': meta,
+                    'nbytes': int(df.memory_usage(index=True, deep=True).sum()),
+                    'refs': {},
+                    'last_access': time.time(),
+                }
+                self._entries[key] = entry
+                self._build_locks.pop(key, None)
+                result = self._touch(entry, session_id)
+
+            self._spill(key, df, meta)
+            return result
+
+    def release(self, key, session_id):
+        """Drops a session's reference, e.g. when it switches to another dataset."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry['refs'].pop(session_id, None)
+
+    def evict_idle(self):
+        """
+        Expires stale session references, evicts unreferenced idle datasets
+        (deleting their files when no other process holds them) and sweeps
+        orphaned dataset files.
+        """
+        now = time.time()
+        evicted = []
+        with self._lock:
+            for key in list(self._entries):
+                entry = self._entries[key]
+                entry['refs'] = {sid: seen for sid, seen in entry['refs'].items()
+                                 if now - seen < self.session_ttl}
+                if not entry['refs'] and now - entry['last_access'] >= self.idle_ttl:
+                    del self._entries[key]
+                    evicted.append(key)
+        for key in evicted:
+            self._drop_ref(key)
+        self._sweep_files(now)
+
+    def stats(self):
+        """Summary of resident datasets for diagnostics."""
+        with self._lock:
+            return {
+                'datasets': len(self._entries),
+                'sessions': sum(len(e['refs']) for e in self._entries.values()),
+                'resident_bytes': sum(e['nbytes'] for e in self._entries.values()),
+            }
+
+    def dataset_path(self, key):
+        """
+        Where a dataset built outside this process (e.g. by a background job)
+        should be written so acquire() picks it up: the Arrow spill file when
+        spilling is enabled, otherwise a pickle in the temp directory.
+        """
+        if self.spill_dir is not None:
+            return os.path.join(self.spill_dir, f"{key}.v{self.version}.arrow")
+        return os.path.join(tempfile.gettempdir(), 'caprae_datasets', f"{key}.v{self.version}.pkl")
+
+    def contains(self, key):
+        """True if the dataset is resident or can be loaded without rebuilding it."""
+        with self._lock:
+            if key in self._entries:
+                return True
+        return os.path.exists(self.dataset_path(key))
+
+    # --- Internals ---
+    def _touch(self, entry, session_id):
+        now = time.time()
+        entry['refs'][session_id] = now
+        entry['last_access'] = now
+        return entry['df'], entry['meta']
+
+    def _spill(self, key, df, meta):
+        if self.spill_dir is None or os.path.exists(self.dataset_path(key)):
+            return
+        try:
+            save_dataset(self.dataset_path(key), df, meta)
+        except Exception:
+            # Spilling is an optimisation; the in-process copy is still valid
+            pass
+
+    def _load_spilled(self, key):
+        path = self.dataset_path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            return load_dataset(path)
+        except Exception:
+            return None
+
+    # --- Cross-Process File References ---
+    def _ref_path(self, key):
+        return f"{self.dataset_path(key)}.ref-{os.getpid()}"
+
+    def _add_ref(self, key):
+        try:
+            os.makedirs(os.path.dirname(self.dataset_path(key)), exist_ok=True)
+            open(self._ref_path(key), 'a').close()
+        except OSError:
+            pass
+
+    def _drop_ref(self, key):
+        """Removes this process's reference and deletes the file if it was the last one."""
+        remove_file(self._ref_path(key))
+        path = self.dataset_path(key)
+        if not live_references(path):
+            remove_file(path)
+
+    def _sweep_files(self, now):
+        """Deletes dataset files nobody references that are older than idle_ttl (e.g. job
+        results never loaded, or files written for an older pipeline version)."""
+        directory = os.path.dirname(self.dataset_path(''))
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(directory, name)
+            if not name.endswith(('.arrow', '.pkl')) or live_references(path):
+                continue
+            try:
+                if now - os.path.getmtime(path) >= self.idle_ttl:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def live_references(path):
+    """True if a running process holds `path`; markers left by dead processes are removed."""
+    directory, name = os.path.split(path)
+    prefix = name + '.ref-'
+    try:
+        markers = [m for m in os.listdir(directory) if m.startswith(prefix)]
+    except OSError:
+        return False
+    live = False
+    for marker in markers:
+        pid = marker[len(prefix):]
+        if pid.isdigit() and pid_alive(int(pid)):
+            live = True
+        else:
+            remove_file(os.path.join(directory, marker))
+    return live
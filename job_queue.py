@@ -0,0 +1,171 @@
+# job_queue.py
+import os
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+JOB_WORKERS = 2                 # Worker processes shared by every session
+FINISHED_JOB_TTL = 30 * 60      # Forget finished jobs (and delete their files) after 30 minutes
+POLL_INTERVAL = 1.0             # Seconds between UI refreshes while a job runs
+
+ACTIVE_STATUSES = ('queued', 'running', 'cancelling')
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker when the job has been cancelled."""
+
+
+class JobContext:
+    """
+    Handed to every task as its first argument. Tasks report progress
+    through it and call check_cancelled() between steps; both are backed
+    by manager proxies so they work across the process boundary.
+    """
+
+    def __init__(self, state, cancel_event):
+        self.state = state
+        self.cancel_event = cancel_event
+
+    def progress(self, fraction, message=None):
+        self.check_cancelled()
+        self.state['progress'] = max(0.0, min(float(fraction), 1.0))
+        if message is not None:
+            self.state['message'] = message
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+
+    def partial(self, value):
+        """Publishes an interim result (e.g. estimates) the UI can show before the job finishes."""
+        self.check_cancelled()
+        self.state['partial'] = value
+
+
+def _run_job(task, context, args):
+    """Worker-side wrapper: marks the job running, then runs the task."""
+    context.check_cancelled()
+    context.state['status'] = 'running'
+    return task(context, *args)
+
+
+class Job:
+    """Parent-side record of one submitted task."""
+
+    def __init__(self, key, future, context, files=()):
+        self.key = key
+        self.future = future
+        self.context = context
+        self.files = list(files)
+        self.submitted_at = time.time()
+        self.finished_at = None
+
+    @property
+    def status(self):
+        """
+        'queued', 'running', 'cancelling', 'done', 'failed' or 'cancelled'.
+        A cancelled job stays 'cancelling' (active) until its worker has
+        stopped, so it isn't restarted while still holding its files.
+        """
+        if not self.future.done():
+            return 'cancelling' if self.context.cancel_event.is_set() else self.context.state.get('status', 'queued')
+        if self.finished_at is None:
+            self.finished_at = time.time()
+        if self.future.cancelled():
+            return 'cancelled'
+        error = self.future.exception()
+        if error is None:
+            return 'done'
+        return 'cancelled' if isinstance(error, JobCancelled) else 'failed'
+
+    @property
+    def progress(self):
+        return 1.0 if self.status == 'done' else self.context.state.get('progress', 0.0)
+
+    @property
+    def message(self):
+        return self.context.state.get('message', 'Waiting for a free worker...')
+
+    @property
+    def partial(self):
+        """Latest interim result the task published, if any."""
+        return self.context.state.get('partial')
+
+    @property
+    def result(self):
+        return self.future.result() if self.status == 'done' else None
+
+    @property
+    def error(self):
+        if self.status != 'failed':
+            return None
+        error = self.future.exception()
+        return f"{type(error).__name__}: {error}"
+
+
+class JobManager:
+    """
+    Process pool plus a registry of jobs keyed by (kind, dataset hash,
+    parameters). Submitting a key that is already queued, running or done
+    returns the existing job instead of starting a duplicate, so reruns and
+    other sessions asking for the same work share one job.
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS, finished_ttl=FINISHED_JOB_TTL):
+        # 'spawn' keeps workers independent of the server's threads
+        context = multiprocessing.get_context('spawn')
+        self._pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=context)
+        self._manager = context.Manager()
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self.finished_ttl = finished_ttl
+
+    def submit(self, key, task, *args, restart=False, files=()):
+        """
+        Returns the job for `key`, starting `task(context, *args)` in the pool
+        unless an identical job is already in flight or done. Failed and
+        cancelled jobs are only replaced when `restart` is True. `files` are
+        paths the job owns (inputs it reads, artifacts it writes); they are
+        deleted when the job is evicted.
+        """
+        self.evict_finished()
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None:
+                if job.status in ACTIVE_STATUSES or job.status == 'done' or not restart:
+                    return job
+
+            context = JobContext(
+                self._manager.dict({'status': 'queued', 'progress': 0.0}),
+                self._manager.Event(),
+            )
+            future = self._pool.submit(_run_job, task, context, args)
+            job = Job(key, future, context, files)
+            self._jobs[key] = job
+            return job
+
+    def get(self, key):
+        with self._lock:
+            return self._jobs.get(key)
+
+    def cancel(self, key):
+        """Cancels a queued job outright or signals a running one to stop."""
+        job = self.get(key)
+        if job is None:
+            return
+        job.context.cancel_event.set()
+        job.future.cancel()
+
+    def evict_finished(self):
+        """Drops finished jobs older than the TTL from the registry and deletes their files."""
+        now = time.time()
+        with self._lock:
+            for key in list(self._jobs):
+                job = self._jobs[key]
+                if job.status not in ACTIVE_STATUSES and job.finished_at is not None \
+                        and now - job.finished_at >= self.finished_ttl:
+                    del self._jobs[key]
+                    for path in job.files:
+                        try: os.remove(path)
+                        except FileNotFoundError: pass
@@ -0,0 +1,506 @@
+# lead_pipeline.py
+import os
+import ctypes
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa  # Backs pandas' text columns when installed
+except ImportError:
+    pa = None
+try:
+    malloc_trim = ctypes.CDLL('libc.so.6').malloc_trim  # glibc: returns freed heap pages to the OS
+except (OSError, AttributeError):
+    malloc_trim = None
+
+from Engine.csv_ingest import read_leads_csv, reservoir_sample_csv
+from dataset_store import save_dataset
+
+# Bump whenever the enriched output (columns, dtypes, scoring) changes, so
+# datasets saved by older code are rebuilt instead of served
+PIPELINE_VERSION = 1
+# Peak working memory allowed for the enrichment pipeline, as a multiple of the
+# input size (counting columns filled with defaults), but never below the floor
+PIPELINE_MEMORY_BUDGET = 1.5
+PIPELINE_MEMORY_FLOOR = 64 * 1024 * 1024
+# Text columns are parsed as numbers this many rows at a time: pd.to_numeric
+# builds a Python object per value, several times the column's own size
+NUMERIC_CHUNK_ROWS = 10000
+# Per-value overhead of a Python str object, for budgeting those conversions
+PY_STR_OVERHEAD = 64
+# Rows written per step by export jobs (progress and cancellation granularity)
+EXPORT_CHUNK_ROWS = 50000
+
+# Progressive results for background scoring: rows sampled up front, leads
+# previewed, the dashboard's High Priority cut-off and the 95% CI multiplier
+PREVIEW_SAMPLE_ROWS = 20000
+PREVIEW_TOP_LEADS = 10
+HIGH_PRIORITY_MIN_SCORE = 90
+CONFIDENCE_Z = 1.96
+PREVIEW_COLUMNS = ['Company Name', 'Industry', 'Annual Revenue (USD)', 'AI_Acquisition_Score', 'Legacy_Tech_Flag']
+
+# --- Pipeline Memory Budget ---
+class PipelineMemoryBudget:
+    """
+    Accounts for the buffers the enrichment pipeline is about to allocate and
+    refuses any step that would push the projected peak past the budget.
+    """
+    def __init__(self, input_bytes, multiplier=PIPELINE_MEMORY_BUDGET, floor=PIPELINE_MEMORY_FLOOR):
+        self.limit = max(int(input_bytes * multiplier), floor)
+        self.live = input_bytes
+        self.peak = input_bytes
+
+    def allocate(self, nbytes, step):
+        if self.live + nbytes > self.limit:
+            raise MemoryError(
+                f"{step} would need {(self.live + nbytes) / 1e6:.1f} MB, over the "
+                f"{self.limit / 1e6:.1f} MB pipeline memory budget"
+            )
+        self.live += nbytes
+        self.peak = max(self.peak, self.live)
+
+    def free(self, nbytes):
+        self.live -= nbytes
+
+def column_bytes(series):
+    """Buffer size of one column (string contents included)."""
+    return int(series.memory_usage(index=False, deep=True))
+
+def release_unused_memory():
+    """
+    Hands pages cached from freed columns (by Arrow's memory pool for text,
+    by glibc's heap for numbers) back to the OS; otherwise each replaced
+    column adds to the process size.
+    """
+    if pa is not None:
+        pa.default_memory_pool().release_unused()
+    if malloc_trim is not None:
+        malloc_trim(0)
+
+def is_text(series):
+    """True for columns that must be parsed before they can be compared as numbers."""
+    return not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series)
+
+def text_to_numeric(series, strip=None):
+    """
+    pd.to_numeric(errors='coerce') over NUMERIC_CHUNK_ROWS rows at a time,
+    first removing characters matching the `strip` regex (e.g. currency
+    symbols), so only one chunk's worth of Python strings exists at once.
+    """
+    parsed = []
+    for start in range(0, len(series), NUMERIC_CHUNK_ROWS):
+        # Reuse what earlier steps and the previous chunk freed
+        release_unused_memory()
+        chunk = series.iloc[start:start + NUMERIC_CHUNK_ROWS]
+        if strip is not None:
+            chunk = chunk.astype(str).str.replace(strip, '', regex=True)
+        parsed.append(pd.to_numeric(chunk, errors='coerce'))
+        del chunk
+    if not parsed:
+        return pd.to_numeric(series, errors='coerce')
+    return pd.concat(parsed) if len(parsed) > 1 else parsed[0]
+
+def text_to_numeric_bytes(series, strip=None):
+    """
+    Working memory of text_to_numeric besides its float64 result: the parsed
+    chunks (until they are joined) and one chunk's strings, twice when
+    stripping keeps the raw and the cleaned chunk alive together.
+    """
+    if not is_text(series):
+        return 0
+    chunk = series.iloc[:NUMERIC_CHUNK_ROWS]
+    chunk_bytes = column_bytes(chunk) + len(chunk) * PY_STR_OVERHEAD
+    return len(series) * 8 + chunk_bytes * (2 if strip is not None else 1)
+
+# --- AI Scoring Functions ---
+# Characters removed from text revenue before it is parsed (e.g. "$1,200,000")
+REVENUE_STRIP = r'[$,"]'
+
+def calculate_ai_score(df, inplace=False):
+    """Calculate AI Acquisition Score based on M&A fit criteria"""
+    if not inplace:
+        df = df.copy()
+    df['AI_Acquisition_Score'] = 50  # Base score
+    
+    # Age bonus (older companies need modernization)
+    df.loc[df['Years in Business'] >= 20, 'AI_Acquisition_Score'] += 20
+    df.loc[(df['Years in Business'] >= 10) & (df['Years in Business'] < 20), 'AI_Acquisition_Score'] += 10
+    df.loc[df['Years in Business'] < 5, 'AI_Acquisition_Score'] -= 10
+    
+    # Revenue sweet spot ($3M-$10M)
+    # Already-numeric columns skip the string round trip entirely
+    revenue = df['Annual Revenue (USD)']
+    if is_text(revenue):
+        revenue = text_to_numeric(revenue, strip=REVENUE_STRIP)
+    df['Annual Revenue (USD)'] = revenue
+    
+    df.loc[(df['Annual Revenue (USD)'] >= 3000000) & (df['Annual Revenue (USD)'] <= 10000000), 'AI_Acquisition_Score'] += 15
+    df.loc[(df['Annual Revenue (USD)'] > 10000000) | (df['Annual Revenue (USD)'] < 3000000), 'AI_Acquisition_Score'] -= 5
+    
+    # Industry focus (traditional industries)
+    traditional_industries = ['Manufacturing', 'Retail', 'Consulting', 'Agency', 'Traditional Consulting', 'Logistics', 'Accounting', 'Insurance', 'Environmental']
+    df.loc[df['Industry'].isin(traditional_industries), 'AI_Acquisition_Score'] += 10
+    
+    return df
+
+def add_tech_flag(df, inplace=False):
+    """Add legacy technology detection"""
+    if not inplace:
+        df = df.copy()
+    
+    # Legacy tech indicators: older companies in traditional industries
+    legacy_conditions = (
+        (df['Years in Business'] >= 15) & 
+        (df['Industry'].isin(['Manufacturing', 'Accounting', 'Insurance', 'Logistics']))
+    ) | (df['Years in Business'] >= 25)
+    
+    # Simulate tech stack detection based on company characteristics
+    # (categorical: two labels shouldn't cost a string per row)
+    df['Legacy_Tech_Flag'] = legacy_conditions
+    df['simulated_tech_stack'] = pd.Categorical.from_codes(
+        legacy_conditions.astype('int8'),
+        categories=['Modern (Cloud-based)', 'Legacy (On-Premise Systems)']
+    )
+    
+    # Bonus for legacy tech
+    df.loc[df['Legacy_Tech_Flag'] == True, 'AI_Acquisition_Score'] += 15
+    
+    # Clip scores to 0-100
+    df['AI_Acquisition_Score'] = df['AI_Acquisition_Score'].clip(0, 100).round().astype(int)
+    
+    return df
+
+# Standard schema every dataset is mapped onto
+REQUIRED_COLUMNS = ['Company Name', 'Contact Name', 'Website', 'Industry', 'Annual Revenue (USD)', 'Years in Business']
+
+# Values for standard columns the upload doesn't have
+COLUMN_DEFAULTS = {
+    'Contact Name': 'N/A',
+    'Website': 'N/A',
+    'Industry': 'General',
+    'Annual Revenue (USD)': 1000000,  # Default 1M
+    'Years in Business': 5,  # Default 5 years
+}
+
+def find_source_columns(df):
+    """Position of the input column supplying each standard field present in `df`."""
+    column_mapping = {
+        # Company Name variations
+        'company_name': 'Company Name', 'company': 'Company Name', 'business_name': 'Company Name',
+        'organization': 'Company Name', 'firm': 'Company Name', 'entity': 'Company Name',
+        'name': 'Company Name', 'client': 'Company Name', 'business': 'Company Name',
+        
+        # Contact Name variations
+        'contact_name': 'Contact Name', 'contact': 'Contact Name', 'person': 'Contact Name',
+        'representative': 'Contact Name', 'lead': 'Contact Name', 'owner': 'Contact Name',
+        'manager': 'Contact Name', 'ceo': 'Contact Name', 'founder': 'Contact Name',
+        
+        # Website variations
+        'website': 'Website', 'url': 'Website', 'web': 'Website', 'site': 'Website',
+        'homepage': 'Website', 'domain': 'Website', 'link': 'Website',
+        
+        # Industry variations
+        'industry': 'Industry', 'sector': 'Industry', 'vertical': 'Industry',
+        'business_type': 'Industry', 'category': 'Industry', 'field': 'Industry',
+        'market': 'Industry', 'niche': 'Industry',
+        
+        # Revenue variations
+        'annual_revenue': 'Annual Revenue (USD)', 'revenue': 'Annual Revenue (USD)',
+        'sales': 'Annual Revenue (USD)', 'turnover': 'Annual Revenue (USD)',
+        'income': 'Annual Revenue (USD)', 'earnings': 'Annual Revenue (USD)',
+        'annual_sales': 'Annual Revenue (USD)', 'yearly_revenue': 'Annual Revenue (USD)',
+        
+        # Years in Business variations
+        'years_in_business': 'Years in Business', 'age': 'Years in Business',
+        'company_age': 'Years in Business', 'years_operating': 'Years in Business',
+        'established': 'Years in Business', 'founded': 'Years in Business',
+        'years_active': 'Years in Business', 'business_age': 'Years in Business'
+    }
+    
+    # Normalize column names and apply mapping
+    normalized = df.columns.str.lower().str.replace(' ', '_').str.replace('(', '').str.replace(')', '').str.replace('-', '_')
+    mapped_names = [column_mapping.get(name, name) for name in normalized]
+    
+    # First source column for each standard field; everything else is dropped
+    source_positions = {}
+    for position, name in enumerate(mapped_names):
+        if name in REQUIRED_COLUMNS and name not in source_positions:
+            source_positions[name] = position
+    return source_positions
+
+def map_columns(df):
+    """Intelligently map column names to standard format"""
+    source_positions = find_source_columns(df)
+    if 'Company Name' not in source_positions:
+        raise KeyError("['Company Name'] not in index")
+    
+    # Fill missing columns with defaults
+    columns = {}
+    for col in REQUIRED_COLUMNS:
+        if col in source_positions:
+            columns[col] = df.iloc[:, source_positions[col]]
+        else:
+            columns[col] = pd.Series(COLUMN_DEFAULTS[col], index=df.index)
+    
+    # The mapped frame shares the input's column buffers; later steps replace
+    # columns rather than writing into them, so the input is never modified
+    return pd.DataFrame(columns, copy=False)
+
+def process_uploaded_data(df, memory_budget=PIPELINE_MEMORY_BUDGET):
+    """
+    Process uploaded dataset and return enriched data.
+    
+    No step copies the whole frame: mapping shares the input's buffers and the
+    cleaning/scoring steps work in place on the frame the pipeline owns. When
+    the caller passes its only reference, input columns are released as soon
+    as they are replaced. `memory_budget` caps projected peak memory as a
+    multiple of the input size plus any default-filled columns, never below
+    PIPELINE_MEMORY_FLOOR (None disables the check).
+    """
+    input_bytes = int(df.memory_usage(index=True, deep=True).sum())
+    source_positions = find_source_columns(df)
+    
+    # Map columns intelligently
+    df_mapped = map_columns(df)
+    del df  # Unmapped input columns go as soon as the caller has let go too
+    
+    budget = None
+    if memory_budget is not None:
+        # Columns filled with defaults are part of the data the pipeline must hold
+        filled_bytes = sum(column_bytes(df_mapped[col]) for col in REQUIRED_COLUMNS if col not in source_positions)
+        budget = PipelineMemoryBudget(input_bytes + filled_bytes, memory_budget)
+    
+    # Clean data: one numeric coercion both filters and converts 'Years in Business'
+    years = df_mapped['Years in Business']
+    if budget:
+        # The float64 result, plus parsing text chunk by chunk
+        parsing_bytes = text_to_numeric_bytes(years)
+        budget.allocate(len(years) * 8 + parsing_bytes, "Coercing Years in Business")
+    years = text_to_numeric(years) if is_text(years) else pd.to_numeric(years, errors='coerce')
+    valid = years.notna()
+    if budget:
+        budget.free(parsing_bytes)
+    df_mapped['Years in Business'] = years
+    del years  # Held only by the frame, so filtering can free it
+    
+    if not valid.all():
+        # Rebuild column by column so only one column is ever duplicated at a time
+        kept = {}
+        for col in list(df_mapped.columns):
+            source = df_mapped.pop(col)
+            if budget:
+                budget.allocate(column_bytes(source), f"Filtering '{col}'")
+            kept[col] = source[valid]
+            if budget:
+                budget.free(column_bytes(source))
+            del source
+            release_unused_memory()
+        df_cleaned = pd.DataFrame(kept, copy=False)
+        del kept  # Columns that scoring replaces (e.g. text revenue) are then freed
+        
+        # Whole-number text coerces to float next to the NaNs; restore integers now they're gone
+        years = df_cleaned['Years in Business']
+        if years.dtype.kind == 'f' and (years % 1 == 0).all():
+            df_cleaned['Years in Business'] = years.astype('int64')
+        del years
+    else:
+        df_cleaned = df_mapped
+    
+    # Apply scoring on the frame we now own
+    if budget:
+        # Score (int64), numeric revenue (float64), legacy flag and tech stack codes,
+        # plus parsing text revenue (e.g. "$1,200,000") chunk by chunk
+        budget.allocate(len(df_cleaned) * 18, "Scoring")
+        budget.allocate(text_to_numeric_bytes(df_cleaned['Annual Revenue (USD)'], strip=REVENUE_STRIP),
+                        "Parsing Annual Revenue (USD)")
+    df_scored = calculate_ai_score(df_cleaned, inplace=True)
+    df_enriched = add_tech_flag(df_scored, inplace=True)
+    
+    return df_enriched
+
+# --- Progressive Results ---
+class ProgressiveStats:
+    """
+    Quick Stats estimates for a dataset that is still being scored.
+
+    Rows already scored are counted exactly; the rest are estimated from the
+    enriched reservoir-sample rows that fall in the unscored remainder of the
+    file (a uniform sample of it), so the 95% confidence intervals narrow as
+    each chunk completes and close once every row is scored.
+    """
+
+    def __init__(self, sample_enriched, sample_positions, total_rows):
+        positions = np.asarray(sample_positions, dtype=np.int64)
+        kept = pd.Series(False, index=sample_positions)
+        kept[sample_enriched.index] = True
+        scores = sample_enriched['AI_Acquisition_Score'].reindex(sample_positions, fill_value=0)
+        legacy = sample_enriched['Legacy_Tech_Flag'].reindex(sample_positions, fill_value=False)
+        
+        # Per sampled row: kept by the pipeline, score, legacy and high-priority (0 when dropped)
+        self.positions = positions
+        self.kept = kept.to_numpy(dtype=float)
+        self.scores = scores.to_numpy(dtype=float)
+        self.legacy = legacy.to_numpy(dtype=float)
+        self.high = (self.scores >= HIGH_PRIORITY_MIN_SCORE).astype(float)
+        self.sample_enriched = sample_enriched
+        self.total_rows = total_rows
+        
+        self.rows_scored = 0
+        self.exact = {'kept': 0, 'scores': 0.0, 'legacy': 0, 'high': 0}
+        self.top_leads = sample_enriched.iloc[:0]
+
+    def add_chunk(self, enriched, rows_scored):
+        """Folds in a scored chunk; `rows_scored` counts file rows read so far (kept or not)."""
+        score = enriched['AI_Acquisition_Score']
+        self.exact['kept'] += len(enriched)
+        self.exact['scores'] += float(score.sum())
+        self.exact['legacy'] += int(enriched['Legacy_Tech_Flag'].sum())
+        self.exact['high'] += int((score >= HIGH_PRIORITY_MIN_SCORE).sum())
+        self.rows_scored = rows_scored
+        self.top_leads = pd.concat([
+            self.top_leads,
+            enriched.nlargest(PREVIEW_TOP_LEADS, 'AI_Acquisition_Score')[self.top_leads.columns]
+        ]).nlargest(PREVIEW_TOP_LEADS, 'AI_Acquisition_Score')
+
+    def estimates(self):
+        """
+        Dict of (estimate, low, high) for 'total_leads', 'avg_score',
+        'legacy_share' and 'high_priority', plus progress and a preview of
+        the top leads found so far (records).
+        """
+        remaining_rows = max(self.total_rows - self.rows_scored, 0)
+        in_remainder = self.positions >= self.rows_scored
+        if not in_remainder.any():
+            # Too few sampled rows left to describe the tail; fall back to the whole sample
+            in_remainder = np.ones(len(self.positions), dtype=bool)
+        n = int(in_remainder.sum())
+        # Finite population correction: no uncertainty once the remainder is all sampled
+        correction = max(1 - n / remaining_rows, 0.0) if remaining_rows else 0.0
+        
+        def total(exact, values):
+            values = values[in_remainder]
+            variance = remaining_rows ** 2 * correction * values.var(ddof=1 if n > 1 else 0) / n
+            return exact + remaining_rows * values.mean(), variance
+        
+        def ratio(exact, values, kept_total):
+            # Ratio estimator (e.g. score sum / kept rows) with a linearised variance
+            estimate = (exact + remaining_rows * values[in_remainder].mean()) / kept_total if kept_total else 0.0
+            residuals = values[in_remainder] - estimate * self.kept[in_remainder]
+            variance = remaining_rows ** 2 * correction * residuals.var(ddof=1 if n > 1 else 0) / n / kept_total ** 2 if kept_total else 0.0
+            return estimate, variance
+        
+        def interval(estimate, variance, low, high):
+            margin = CONFIDENCE_Z * np.sqrt(variance)
+            return (float(estimate), float(max(estimate - margin, low)), float(min(estimate + margin, high)))
+        
+        kept_total, kept_variance = total(self.exact['kept'], self.kept)
+        high_total, high_variance = total(self.exact['high'], self.high)
+        avg_score, score_variance = ratio(self.exact['scores'], self.scores, kept_total)
+        legacy_share, legacy_variance = ratio(self.exact['legacy'], self.legacy, kept_total)
+        
+        # Best leads so far: scored rows plus sampled rows from the unscored remainder
+        unscored_sample = self.sample_enriched[self.sample_enriched.index >= self.rows_scored]
+        top_leads = pd.concat([self.top_leads, unscored_sample.nlargest(PREVIEW_TOP_LEADS, 'AI_Acquisition_Score')])
+        top_leads = top_leads.nlargest(PREVIEW_TOP_LEADS, 'AI_Acquisition_Score')
+        
+        return {
+            'total_leads': interval(kept_total, kept_variance, self.exact['kept'], self.exact['kept'] + remaining_rows),
+            'avg_score': interval(avg_score, score_variance, 0, 100),
+            'legacy_share': interval(legacy_share, legacy_variance, 0, 1),
+            'high_priority': interval(high_total, high_variance, self.exact['high'], self.exact['high'] + remaining_rows),
+            'rows_scored': int(min(self.rows_scored, self.total_rows)),
+            'total_rows': int(self.total_rows),
+            'exact': remaining_rows == 0,
+            'top_leads': top_leads[PREVIEW_COLUMNS].to_dict('records'),
+        }
+
+# --- Background Job Tasks ---
+# Run in job_queue worker processes; `ctx` is the job's JobContext.
+def score_upload_task(ctx, upload_path, name, result_path):
+    """
+    Reads a saved upload, enriches it and writes (df, meta) to result_path.
+    
+    A reservoir sample is scored first and published as approximate Quick
+    Stats (ProgressiveStats); the file is then scored chunk by chunk, with
+    the estimates republished after every chunk. The upload is deleted once
+    the job ends, whether it succeeded, failed or was cancelled.
+    """
+    try:
+        ctx.progress(0.0, 'Sampling upload for a preview...')
+        try:
+            sample, total_rows = reservoir_sample_csv(
+                upload_path, PREVIEW_SAMPLE_ROWS, name=name,
+                on_progress=lambda fraction: ctx.progress(0.05 * fraction, f'Sampling upload for a preview... {fraction:.0%}')
+            )
+            stats = ProgressiveStats(process_uploaded_data(sample), sample.index, total_rows)
+            ctx.partial(stats.estimates())
+        except ValueError:
+            # No line-based sample (e.g. quoted line breaks); full scoring still runs
+            stats = None
+        
+        meta = {'source_rows': 0, 'original_columns': None}
+        
+        def score_chunk(chunk):
+            if meta['original_columns'] is None:
+                meta['original_columns'] = [str(col) for col in chunk.columns]
+            meta['source_rows'] += len(chunk)
+            rows_read = int(chunk.index[-1]) + 1 if len(chunk) else meta['source_rows']
+            # Held in a list so the pipeline receives the only reference to the chunk
+            raw = [chunk]
+            del chunk
+            enriched = process_uploaded_data(raw.pop())
+            if stats is not None:
+                stats.add_chunk(enriched, rows_read)
+                ctx.partial(stats.estimates())
+            return enriched
+        
+        df, ingest_stats = read_leads_csv(
+            upload_path, name=name, on_chunk=score_chunk,
+            on_progress=lambda fraction: ctx.progress(0.05 + 0.8 * fraction, f'Scoring leads... {fraction:.0%}')
+        )
+        meta['ingest'] = ingest_stats
+        
+        ctx.progress(0.9, 'Saving results...')
+        save_dataset(result_path, df, meta)
+        ctx.progress(1.0, 'Done')
+        return result_path
+    finally:
+        if os.path.exists(upload_path):
+            os.remove(upload_path)
+
+def export_task(ctx, df, fmt, output_path):
+    """Writes `df` as CSV or Excel to output_path in chunks, reporting progress."""
+    label = 'Excel' if fmt == 'xlsx' else 'CSV'
+    ctx.progress(0.0, f'Building {label} export...')
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    # Keep the extension on the temp file: pandas' ExcelWriter checks it
+    root, extension = os.path.splitext(output_path)
+    tmp_path = f'{root}.{os.getpid()}.tmp{extension}'
+    starts = range(0, len(df), EXPORT_CHUNK_ROWS) if len(df) else [0]
+    
+    try:
+        if fmt == 'xlsx':
+            with pd.ExcelWriter(tmp_path, engine='xlsxwriter') as writer:
+                for start in starts:
+                    df.iloc[start:start + EXPORT_CHUNK_ROWS].to_excel(
+                        writer, index=False, sheet_name='Leads',
+                        startrow=start + 1 if start else 0, header=start == 0
+                    )
+                    ctx.progress(min(start + EXPORT_CHUNK_ROWS, len(df)) / max(len(df), 1) * 0.9,
+                                 f'Building {label} export...')
+                ctx.progress(0.95, f'Saving {label} file...')
+        else:
+            with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+                for start in starts:
+                    df.iloc[start:start + EXPORT_CHUNK_ROWS].to_csv(f, index=False, header=start == 0)
+                    ctx.progress(min(start + EXPORT_CHUNK_ROWS, len(df)) / max(len(df), 1),
+                                 f'Building {label} export...')
+    except BaseException:
+        # Cancelled or failed part-way: don't leave the partial file behind
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    
+    os.replace(tmp_path, output_path)
+    ctx.progress(1.0, 'Done')
+    return output_path
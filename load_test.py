@@ -0,0 +1,253 @@
+# load_test.py
+"""
+Headless load test for the Streamlit dashboard.
+
+Drives N concurrent simulated analyst sessions against app.py with
+Streamlit's testing API: each session uploads a synthetic lead dataset and
+replays a random sequence of filter/sort interactions. Reports per-rerun
+latency percentiles, throughput and the memory of the worker and of its
+background job processes.
+
+    python load_test.py --sessions 8 --rows 50000 --interactions 20
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+APP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+RERUN_TIMEOUT = 300  # Seconds a single rerun may take before the session is failed
+
+INDUSTRIES = ['Manufacturing', 'Retail', 'Software', 'Consulting', 'Healthcare', 'Finance',
+              'Logistics', 'Accounting', 'Insurance', 'Agency']
+
+# Widgets the simulated analyst plays with, by label
+PRIORITY_LABEL = "🎯 Priority Level"
+TECH_LABEL = "💻 Technology Status"
+INDUSTRY_LABEL = "🏭 Industry Focus"
+SORT_LABEL = "Sort by:"
+
+# --- 1. Synthetic Data ---
+def synthetic_leads_csv(rows, seed=0):
+    """CSV bytes for `rows` random leads in the dashboard's standard schema."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Company Name': [f"Company {seed}-{i}" for i in range(rows)],
+        'Contact Name': rng.choice(['Alex Clark', 'Jordan Lewis', 'Taylor Garcia', 'Morgan Robinson'], rows),
+        'Website': [f"company{seed}-{i}.com" for i in range(rows)],
+        'Industry': rng.choice(INDUSTRIES, rows),
+        'Annual Revenue (USD)': rng.integers(100000, 50000000, rows),
+        'Years in Business': rng.integers(1, 40, rows),
+    })
+    return df.to_csv(index=False).encode('utf-8')
+
+# --- 2. Simulated Sessions ---
+def find_widget(widgets, label):
+    return next(widget for widget in widgets if widget.label == label)
+
+def timed_run(at, latencies):
+    start = time.perf_counter()
+    at.run(timeout=RERUN_TIMEOUT)
+    latencies.append(time.perf_counter() - start)
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+def run_session(session_index, csv_bytes, interactions, seed):
+    """
+    One analyst: open the app, upload the dataset, then change a random
+    filter or the sort order `interactions` times. Returns per-rerun latencies.
+    """
+    rng = random.Random(seed + session_index)
+    latencies = {'load': [], 'upload': [], 'interaction': []}
+
+    at = AppTest.from_file(APP_FILE, default_timeout=RERUN_TIMEOUT)
+    timed_run(at, latencies['load'])
+
+    at.file_uploader[0].set_value((f"leads_{session_index}.csv", csv_bytes, 'text/csv'))
+    timed_run(at, latencies['upload'])
+
+    for _ in range(interactions):
+        action = rng.choice(['priority', 'tech', 'industry', 'sort'])
+        if action == 'priority':
+            widget = find_widget(at.selectbox, PRIORITY_LABEL)
+            # Custom Range adds a slider the script then needs; keep to the presets
+            widget.set_value(rng.choice([o for o in widget.options if o != "Custom Range"]))
+        elif action == 'tech':
+            widget = find_widget(at.radio, TECH_LABEL)
+            widget.set_value(rng.choice(widget.options))
+        elif action == 'industry':
+            widget = find_widget(at.selectbox, INDUSTRY_LABEL)
+            widget.set_value(rng.choice(widget.options))
+        else:
+            sort_widgets = [w for w in at.selectbox if w.label == SORT_LABEL]
+            if not sort_widgets:
+                # Current filters match nothing, so there is no sort control; reset them
+                find_widget(at.selectbox, PRIORITY_LABEL).set_value("All Priorities")
+            else:
+                sort_widgets[0].set_value(rng.choice(sort_widgets[0].options))
+        timed_run(at, latencies['interaction'])
+
+    return latencies
+
+# --- 3. Memory Sampling ---
+def current_rss(pid='self'):
+    """Resident set size of a process in bytes (Linux /proc, else this process's peak via resource)."""
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        if pid != 'self':
+            return 0  # Exited since it was listed
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+def child_pids(pid):
+    """All descendants of a process (Linux /proc; empty elsewhere)."""
+    children = []
+    try:
+        for tid in os.listdir(f'/proc/{pid}/task'):
+            with open(f'/proc/{pid}/task/{tid}/children') as f:
+                children.extend(int(child) for child in f.read().split())
+    except OSError:
+        return []
+    return children + [grandchild for child in children for grandchild in child_pids(child)]
+
+def job_processes_rss():
+    """Summed RSS of this process's children: the job pool's workers and its manager process."""
+    return sum(current_rss(pid) for pid in child_pids(os.getpid()))
+
+class RssSampler(threading.Thread):
+    """Background thread recording the peak RSS of this process, its job processes and both together."""
+
+    def __init__(self, interval=0.05):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = current_rss()
+        self.jobs_peak = job_processes_rss()
+        self.total_peak = self.peak + self.jobs_peak
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            worker, jobs = current_rss(), job_processes_rss()
+            self.peak = max(self.peak, worker)
+            self.jobs_peak = max(self.jobs_peak, jobs)
+            self.total_peak = max(self.total_peak, worker + jobs)
+            time.sleep(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+# --- 4. Load Test ---
+def percentiles(values):
+    if not values:
+        return {}
+    ms = np.array(values) * 1000
+    return {
+        'count': len(ms),
+        'p50_ms': round(float(np.percentile(ms, 50)), 1),
+        'p90_ms': round(float(np.percentile(ms, 90)), 1),
+        'p99_ms': round(float(np.percentile(ms, 99)), 1),
+        'max_ms': round(float(ms.max()), 1),
+    }
+
+def load_test(sessions=4, rows=10000, interactions=10, shared_dataset=False, seed=0):
+    """
+    Runs `sessions` concurrent simulated sessions in this process (one
+    Streamlit worker) and returns the latency, throughput and memory report.
+    With shared_dataset=True every session uploads the same file.
+    """
+    datasets = [synthetic_leads_csv(rows, seed if shared_dataset else seed + i) for i in range(sessions)]
+    baseline_rss, baseline_jobs_rss = current_rss(), job_processes_rss()
+    sampler = RssSampler()
+    sampler.start()
+
+    results, errors = [], []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        futures = [pool.submit(run_session, i, datasets[i], interactions, seed) for i in range(sessions)]
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+    elapsed = time.perf_counter() - start
+    sampler.stop()
+
+    all_reruns = [latency for result in results for kind in result for latency in result[kind]]
+    return {
+        'sessions': sessions,
+        'rows_per_dataset': rows,
+        'dataset_mb': round(len(datasets[0]) / 1e6, 2),
+        'shared_dataset': shared_dataset,
+        'failed_sessions': len(errors),
+        'errors': errors,
+        'elapsed_s': round(elapsed, 2),
+        'reruns': len(all_reruns),
+        'throughput_reruns_per_s': round(len(all_reruns) / elapsed, 2) if elapsed else 0.0,
+        'latency': {
+            'all': percentiles(all_reruns),
+            **{kind: percentiles([l for result in results for l in result[kind]])
+               for kind in ('load', 'upload', 'interaction')},
+        },
+        'worker_rss_mb': {
+            'baseline': round(baseline_rss / 1e6, 1),
+            'peak': round(sampler.peak / 1e6, 1),
+            'final': round(current_rss() / 1e6, 1),
+        },
+        # Background jobs (large uploads and exports) run in child processes
+        'job_processes_rss_mb': {
+            'baseline': round(baseline_jobs_rss / 1e6, 1),
+            'peak': round(sampler.jobs_peak / 1e6, 1),
+            'final': round(job_processes_rss() / 1e6, 1),
+        },
+        'total_peak_rss_mb': round(sampler.total_peak / 1e6, 1),
+    }
+
+def print_report(report):
+    print(f"\nLOAD TEST: {report['sessions']} sessions x {report['rows_per_dataset']} rows "
+          f"({report['dataset_mb']} MB CSV, {'shared' if report['shared_dataset'] else 'distinct'} datasets)")
+    print(f"Reruns: {report['reruns']} in {report['elapsed_s']}s -> {report['throughput_reruns_per_s']} reruns/s")
+    print(f"Failed sessions: {report['failed_sessions']}")
+    for error in report['errors']:
+        print(f"  {error}")
+
+    print(f"\n{'Rerun type':<12} {'count':>6} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for kind, stats in report['latency'].items():
+        if stats:
+            print(f"{kind:<12} {stats['count']:>6} {stats['p50_ms']:>9} {stats['p90_ms']:>9} "
+                  f"{stats['p99_ms']:>9} {stats['max_ms']:>9}")
+
+    rss = report['worker_rss_mb']
+    print(f"\nWorker RSS: baseline {rss['baseline']} MB, peak {rss['peak']} MB, final {rss['final']} MB")
+    jobs = report['job_processes_rss_mb']
+    print(f"Job processes RSS: baseline {jobs['baseline']} MB, peak {jobs['peak']} MB, final {jobs['final']} MB")
+    print(f"Total peak RSS: {report['total_peak_rss_mb']} MB")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load-test the dashboard with concurrent headless sessions.")
+    parser.add_argument('--sessions', type=int, default=4, help="Concurrent simulated analysts")
+    parser.add_argument('--rows', type=int, default=10000, help="Rows in each synthetic dataset")
+    parser.add_argument('--interactions', type=int, default=10, help="Filter/sort changes per session")
+    parser.add_argument('--shared-dataset', action='store_true', help="All sessions upload the same file")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for data and interaction sequences")
+    parser.add_argument('--json', help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = load_test(args.sessions, args.rows, args.interactions, args.shared_dataset, args.seed)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report saved to '{args.json}'.")
+    sys.exit(1 if report['failed_sessions'] else 0)
@@ -0,0 +1,30 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'Engine'))
+
+from csv_ingest import HAS_PYARROW, PYARROW_BLOCK_BYTES, read_leads_csv
+
+
+@pytest.mark.skipif(not HAS_PYARROW, reason="needs pyarrow")
+def test_late_bad_value_falls_back_to_c_parser(tmp_path):
+    # The bad value lands well past the first record batch, whose types pyarrow keeps
+    rows = 1200000
+    years = np.random.default_rng(0).integers(1, 40, rows).astype(str)
+    years[-5:] = 'unknown'
+    path = tmp_path / 'late.csv'
+    with open(path, 'w') as f:
+        f.write('Company Name,Industry,Annual Revenue (USD),Years in Business\n')
+        f.writelines(f"Company {i},Retail,5000000,{y}\n" for i, y in enumerate(years))
+    assert os.path.getsize(path) > 2 * PYARROW_BLOCK_BYTES
+
+    df, stats = read_leads_csv(str(path), backend='pyarrow', on_chunk=lambda chunk: chunk)
+    assert stats['backend'] == 'pyarrow+c'
+    assert len(df) == rows
+    assert df.index.tolist() == list(range(rows))
+    assert df['Company Name'].iloc[-1] == f"Company {rows - 1}"
+    assert (df['Years in Business'].iloc[-5:] == 'unknown').all()
@@ -0,0 +1,120 @@
+import json
+import os
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from lead_pipeline import PIPELINE_MEMORY_BUDGET, PIPELINE_MEMORY_FLOOR, PipelineMemoryBudget, process_uploaded_data
+
+# Runs in a fresh interpreter so the RSS numbers only reflect this pipeline run;
+# a sampler thread tracks the peak because ru_maxrss already includes building the
+# frame. A warm-up run on the first rows comes first so one-off allocator caches
+# (Arrow's memory pool keeps freed pages for reuse) aren't counted. With 'messy',
+# revenue is "$1,234,567" text and 5% of the years are 'unknown'.
+MEASURE_SCRIPT = """
+import gc, json, resource, sys, threading, time
+import numpy as np, pandas as pd
+from lead_pipeline import NUMERIC_CHUNK_ROWS, process_uploaded_data
+
+def rss():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * resource.getpagesize()
+
+n, messy = int(sys.argv[1]), sys.argv[2] == 'messy'
+rng = np.random.default_rng(0)
+words = np.array(['Harbor', 'Alpha', 'Summit', 'Pine', 'Delta', 'Nova', 'Iron', 'Blue'])
+df = pd.DataFrame({
+    'Company Name': pd.Series(words[rng.integers(0, 8, n)]).str.cat(rng.integers(0, 10**6, n).astype(str), sep=' '),
+    'Contact Name': 'Jane Doe',
+    'Website': 'example.com',
+    'Industry': words[rng.integers(0, 8, n)],
+    'Revenue': rng.integers(10**5, 10**8, n),
+    'Years in Business': rng.integers(1, 40, n),
+})
+if messy:
+    df['Revenue'] = '$' + df['Revenue'].map('{:,}'.format)
+    years = df['Years in Business'].astype(str)
+    years[rng.random(n) < 0.05] = 'unknown'
+    df['Years in Business'] = years
+    del years
+process_uploaded_data(df.head(NUMERIC_CHUNK_ROWS).copy())
+input_bytes = int(df.memory_usage(index=True, deep=True).sum())
+gc.collect()
+
+baseline = rss()
+peak = [baseline]
+done = threading.Event()
+def sample():
+    while not done.is_set():
+        peak[0] = max(peak[0], rss())
+        time.sleep(0.001)
+sampler = threading.Thread(target=sample)
+sampler.start()
+# Handed over as the only reference, as the app and the scoring job do
+frames = [df]
+del df
+try:
+    result = process_uploaded_data(frames.pop())
+finally:
+    done.set()
+    sampler.join()
+print(json.dumps({'input_bytes': input_bytes, 'growth': peak[0] - baseline, 'rows': len(result)}))
+"""
+
+
+def measure(rows, data):
+    completed = subprocess.run(
+        [sys.executable, '-c', MEASURE_SCRIPT, str(rows), data],
+        cwd=ROOT, capture_output=True, text=True, check=True, timeout=300,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/statm'), reason="needs /proc to read RSS")
+def test_peak_memory_stays_within_budget():
+    rows = 500000
+    stats = measure(rows, 'clean')
+    assert stats['rows'] == rows
+    # The budget covers everything held at the peak, the input included
+    assert stats['growth'] + stats['input_bytes'] <= PIPELINE_MEMORY_BUDGET * stats['input_bytes']
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/statm'), reason="needs /proc to read RSS")
+def test_peak_memory_with_text_revenue_and_invalid_years():
+    # Parsing "$1,234,567" text and filtering rows add the pipeline's largest temporaries
+    rows = 500000
+    stats = measure(rows, 'messy')
+    assert 0.9 * rows < stats['rows'] < rows
+    assert stats['growth'] + stats['input_bytes'] <= PIPELINE_MEMORY_BUDGET * stats['input_bytes']
+
+
+def test_small_upload_is_not_rejected():
+    df = pd.DataFrame({
+        'Company Name': [f"Company {i}" for i in range(200)],
+        'Industry': 'Retail',
+        'Annual Revenue (USD)': 5000000,
+        'Years in Business': 12,
+    })
+    result = process_uploaded_data(df)
+    assert len(result) == 200
+    assert 'AI_Acquisition_Score' in result.columns
+
+
+def test_single_column_upload_is_not_rejected():
+    df = pd.DataFrame({'Company': [f"Company {i}" for i in range(200)]})
+    result = process_uploaded_data(df)
+    assert len(result) == 200
+    assert (result['Years in Business'] == 5).all()
+
+
+def test_budget_floor_and_limit():
+    assert PipelineMemoryBudget(100).limit == PIPELINE_MEMORY_FLOOR
+    budget = PipelineMemoryBudget(1000, floor=0)
+    budget.allocate(400, "Step")
+    with pytest.raises(MemoryError):
+        budget.allocate(200, "Step")
@@ -0,0 +1,35 @@
+import os
+import sys
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'Engine'))
+
+from tech_kb import TechStackKB
+
+
+def build_kb():
+    return TechStackKB.build(pd.DataFrame({
+        'Company Name': ['Harbor Consulting Inc.', 'Alpha Digital Inc.', 'Blue Sky Software LLC', 'Nova 2 Logistics'],
+        'Tech Stack': ['Legacy (AS400 ERP)', 'Modern (AWS Serverless)', 'Modern (Ruby on Rails)', 'Hybrid (Custom PHP)'],
+    }))
+
+
+def test_typos_match():
+    matches = build_kb().join(pd.Series(['Blue Sky Sofware', 'Harbour Consulting', 'Alpha Digtal']))
+    assert list(matches['kb_company']) == ['Blue Sky Software LLC', 'Harbor Consulting Inc.', 'Alpha Digital Inc.']
+    assert matches['legacy_flag'].tolist() == [False, True, False]
+
+
+def test_similarly_named_companies_do_not_match():
+    leads = pd.Series(['Harbor Consulting Group', 'Alpha Digital Agency', 'Alpha Digital Labs', 'Nova 3 Logistics'])
+    matches = build_kb().join(leads)
+    assert matches['match_score'].isna().all()
+    assert not matches['legacy_flag'].any()
+
+
+def test_empty_knowledge_base():
+    kb = TechStackKB.build(pd.DataFrame({'Company Name': pd.Series([], dtype='str'), 'Tech Stack': pd.Series([], dtype='str')}))
+    matches = kb.join(pd.Series(['Acme']), pd.Series(['acme.com']))
+    assert matches['match_score'].isna().all()
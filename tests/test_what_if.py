@@ -0,0 +1,59 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'Engine'))
+
+import enrichment_engine
+from lead_pipeline import process_uploaded_data
+from tech_kb import KB_FILE
+from what_if import what_if
+
+
+def raw_leads(rows=20000, seed=0):
+    """Raw leads as read from a CSV: '$'-formatted revenue, a few descriptive years, some KB companies."""
+    rng = np.random.default_rng(seed)
+    kb_names = pd.read_csv(KB_FILE)['Company Name'].to_numpy()
+    names = np.where(rng.random(rows) < 0.3, rng.choice(kb_names, rows), [f"Company {i}" for i in range(rows)])
+    years = rng.integers(1, 40, rows).astype(object)
+    years[rng.random(rows) < 0.05] = 'unknown'
+    return pd.DataFrame({
+        'Company Name': names,
+        'Industry': rng.choice(['Manufacturing', 'Retail', 'Software', 'Healthcare', 'Logistics'], rows),
+        'Annual Revenue (USD)': [f"${value:,}" for value in rng.integers(500000, 20000000, rows)],
+        'Years in Business': years,
+    })
+
+
+def assert_matches_engine(row, enriched, threshold):
+    scores = enriched['AI_Acquisition_Score']
+    assert row['high_priority_count'] == (scores >= threshold).sum()
+    assert np.isclose(row['avg_score'], scores.mean())
+
+
+def test_baseline_matches_engine_scores():
+    enriched = enrichment_engine.enrich_records(raw_leads())
+    report = what_if(enriched, [])
+    assert_matches_engine(report.iloc[0], enriched, enrichment_engine.HIGH_PRIORITY_SCORE)
+
+
+def test_changed_weights_match_engine_with_those_weights(monkeypatch):
+    raw = raw_leads()
+    config = {'legacy_tech': 30, 'age_20_plus': 5, 'revenue_outside': -15, 'threshold': 75}
+    report = what_if(enrichment_engine.enrich_records(raw.copy()), [config])
+
+    for rule in ('legacy_tech', 'age_20_plus', 'revenue_outside'):
+        monkeypatch.setitem(enrichment_engine.SCORE_WEIGHTS, rule, config[rule])
+    assert_matches_engine(report.iloc[1], enrichment_engine.enrich_records(raw), config['threshold'])
+
+
+def test_empty_input_reports_every_config():
+    leads = process_uploaded_data(pd.DataFrame({'Company Name': ['Acme Inc', 'Harbor LLC']}))
+    report = what_if(leads.iloc[:0], [{'legacy_tech': 25}])
+    assert list(report['name']) == ['baseline', 'legacy_tech=25']
+    assert (report['high_priority_count'] == 0).all()
+    assert (report['top_k_overlap'] == 1.0).all()